@@ -0,0 +1,71 @@
+"""
+Runs the component and polyphony benchmarks, writes the results to JSON and compares them against a baseline.
+Run from the repository root with: python -m benchmarks -o results.json -b baseline.json
+Exits with 1 if any result is slower than the baseline by more than the tolerance.
+"""
+import json
+import logging
+import platform
+import sys
+from optparse import OptionParser
+
+import numpy as np
+
+from . import components, polyphony
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns a list of (suite, name, baseline, result) for the results that regressed.
+    Benchmarks missing on either side are skipped.
+    """
+    regressions = []
+    for suite, baseline_values in baseline.get("results", {}).items():
+        for name, baseline_value in baseline_values.items():
+            value = results.get(suite, {}).get(name)
+            if value is not None and value < baseline_value * (1.0 - tolerance):
+                regressions.append((suite, name, baseline_value, value))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option("-o", "--output", dest="output", default=None, help="File to write the results to as JSON", metavar="FILE")
+    parser.add_option("-b", "--baseline", dest="baseline", default=None, help="Results to compare against", metavar="FILE")
+    parser.add_option("-t", "--tolerance", dest="tolerance", type="float", default=0.10, help="Slowdown allowed before a result counts as a regression")
+    parser.add_option("-q", "--quick", dest="quick", action="store_true", default=False, help="Fewer and shorter runs, for a smoke test")
+    (options, args) = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    repeats = 1 if options.quick else 5
+    results = {
+        "components": components.run(num_chunks=20 if options.quick else 200, repeats=repeats),
+        "generator": polyphony.run(seconds=0.2 if options.quick else 2.0, repeats=repeats),
+        "generator_bank": polyphony.run(seconds=0.2 if options.quick else 2.0, repeats=repeats, use_oscillator_bank=True),
+    }
+    for suite, values in results.items():
+        print(suite)
+        for name, samples_per_second in values.items():
+            print(f"{name:>36} {samples_per_second / 1e6:>10.2f} Msamples/s")
+
+    if options.output:
+        report = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "unit": "samples/s",
+            "results": results,
+        }
+        with open(options.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Wrote results to {options.output}")
+
+    if options.baseline:
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, options.tolerance)
+        for suite, name, baseline_value, value in regressions:
+            print(f"REGRESSION {suite}/{name}: {value / 1e6:.2f} Msamples/s, baseline {baseline_value / 1e6:.2f} ({100.0 * (value / baseline_value - 1.0):+.1f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {100.0 * options.tolerance:.0f}% against {options.baseline}")
@@ -0,0 +1,113 @@
+"""
+Throughput of each signal component on its own, in samples per second.
+Run from the repository root with: python -m benchmarks.components
+"""
+import time
+from optparse import OptionParser
+
+import numpy as np
+
+from synth.synthesis.signal.sine_wave_oscillator import SineWaveOscillator
+from synth.synthesis.signal.square_wave_oscillator import SquareWaveOscillator
+from synth.synthesis.signal.sawtooth_wave_oscillator import SawtoothWaveOscillator
+from synth.synthesis.signal.triangle_wave_oscillator import TriangleWaveOscillator
+from synth.synthesis.signal.wavetable_oscillator import WavetableOscillator
+from synth.synthesis.signal.oscillator_bank import OscillatorBank
+from synth.synthesis.signal.noise_generator import NoiseGenerator
+from synth.synthesis.signal.gain import Gain
+from synth.synthesis.signal.mixer import Mixer
+from synth.synthesis.signal.low_pass_filter import LowPassFilter
+from synth.synthesis.signal.delay import Delay
+from synth.synthesis.signal.envelope import Envelope
+
+sample_rate = 44100
+bank_voices = 16
+
+
+def build_components(frames_per_chunk):
+    """
+    Returns (name, component) for one of each component, set up the way the synth uses it. Effects get sawtooth
+    oscillators as inputs. The oscillators the synth renders its voices with, band-limited and wavetable ones and
+    an oscillator bank, are named after their setup too.
+    """
+    def oscillator(cls, frequency=110.0, **kwargs):
+        osc = cls(sample_rate, frames_per_chunk, **kwargs)
+        osc.frequency = frequency
+        osc.amplitude = 1.0
+        osc.active = True
+        return osc
+
+    noise = NoiseGenerator(sample_rate, frames_per_chunk)
+    noise.active = True
+    lpf = LowPassFilter(sample_rate, frames_per_chunk, [oscillator(SawtoothWaveOscillator)])
+    lpf.cutoff_frequency = 1000.0
+    delay = Delay(sample_rate, frames_per_chunk, [oscillator(SawtoothWaveOscillator)])
+    delay.delay_time = 0.25
+    delay.wet_gain = 0.5
+    envelope = Envelope(sample_rate, frames_per_chunk, [oscillator(SawtoothWaveOscillator)])
+    envelope.active = True
+    bank = OscillatorBank(sample_rate, frames_per_chunk, bank_voices, shape="saw")
+    for voice in range(bank_voices):
+        bank.note_on(voice, 110.0 * 2 ** (voice / 12))
+    components = [
+        oscillator(SineWaveOscillator),
+        oscillator(SquareWaveOscillator),
+        oscillator(SawtoothWaveOscillator),
+        oscillator(TriangleWaveOscillator),
+        noise,
+        Gain(sample_rate, frames_per_chunk, [oscillator(SawtoothWaveOscillator)]),
+        Mixer(sample_rate, frames_per_chunk, [oscillator(SawtoothWaveOscillator), oscillator(SquareWaveOscillator, 220.0)]),
+        lpf,
+        delay,
+        envelope,
+    ]
+    return [(type(component).__name__, component) for component in components] + [
+        ("SquareWaveOscillator[band_limited]", oscillator(SquareWaveOscillator, band_limited=True)),
+        ("SawtoothWaveOscillator[band_limited]", oscillator(SawtoothWaveOscillator, band_limited=True)),
+        *((f"WavetableOscillator[{shape}]", oscillator(WavetableOscillator, shape=shape)) for shape in ("sine", "saw")),
+        (f"OscillatorBank[saw,voices={bank_voices}]", bank),
+    ]
+
+
+def benchmark_component(component, frames_per_chunk, num_chunks, repeats):
+    """
+    Samples per second of one component, best of repeats. Only the component itself is timed:
+    the inputs of effects are rendered once up front and processed over and over.
+    Components that render a block of voices count every voice's samples.
+    """
+    iter(component)
+    out = np.zeros(component.output_shape(frames_per_chunk), np.float32)
+    if len(component.subcomponents) == 0:
+        render = component.render_into
+        args = (out,)
+    else:
+        inputs = [np.array(next(subcomponent)) for subcomponent in component.subcomponents]
+        render = component.process
+        args = (inputs, out)
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(num_chunks):
+            render(*args)
+        best = min(best, time.perf_counter() - start)
+    return num_chunks * out.size / best
+
+
+def run(frames_per_chunk=1024, num_chunks=200, repeats=5):
+    """
+    Returns {component name: samples per second}, see build_components for the names.
+    """
+    return {name: benchmark_component(component, frames_per_chunk, num_chunks, repeats)
+            for name, component in build_components(frames_per_chunk)}
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option("-f", "--frames", dest="frames_per_chunk", type="int", default=1024, help="Frames per chunk")
+    parser.add_option("-c", "--chunks", dest="num_chunks", type="int", default=200, help="Chunks per repeat")
+    parser.add_option("-r", "--repeats", dest="repeats", type="int", default=5, help="Repeats, the best is kept")
+    (options, args) = parser.parse_args()
+
+    for name, samples_per_second in run(options.frames_per_chunk, options.num_chunks, options.repeats).items():
+        print(f"{name:>36} {samples_per_second / 1e6:>10.2f} Msamples/s {samples_per_second / sample_rate:>10.0f}x realtime")
@@ -0,0 +1,63 @@
+"""
+Throughput of the whole Synthesizer.generator across voice counts and chunk sizes, in samples per second.
+Run from the repository root with: python -m benchmarks.polyphony
+"""
+import logging
+import queue
+import time
+from optparse import OptionParser
+
+from synth.synthesizer import Synthesizer
+from synth.playback.offline_sink import NullSink
+
+sample_rate = 44100
+voice_counts = (1, 4, 16, 32)
+chunk_sizes = (64, 256, 1024)
+
+
+def benchmark_generator(num_voices, frames_per_chunk, seconds, repeats, **synthesizer_options):
+    """
+    Samples per second of the generator with every voice sounding, best of repeats.
+    """
+    synthesizer = Synthesizer(sample_rate, frames_per_chunk, queue.Queue(), num_voices=num_voices,
+                              output_sink=lambda generator: NullSink(sample_rate, frames_per_chunk, generator, 0),
+                              **synthesizer_options)
+    generator = synthesizer.generator()
+    for i in range(num_voices):
+        synthesizer.note_on(36 + i, 0)
+    num_chunks = max(1, int(seconds * sample_rate / frames_per_chunk))
+    try:
+        # Starting the generator renders nothing. The first chunk compiles the plans and applies the notes
+        next(generator)
+        next(generator)
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for _ in range(num_chunks):
+                next(generator)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if synthesizer.voice_engine is not None:
+            synthesizer.voice_engine.close()
+    return num_chunks * frames_per_chunk / best
+
+
+def run(voice_counts=voice_counts, chunk_sizes=chunk_sizes, seconds=2.0, repeats=3, **synthesizer_options):
+    """
+    Returns {"voices=<n>,frames=<n>": samples per second} for every combination.
+    """
+    return {f"voices={num_voices},frames={frames_per_chunk}": benchmark_generator(num_voices, frames_per_chunk, seconds, repeats, **synthesizer_options)
+            for num_voices in voice_counts for frames_per_chunk in chunk_sizes}
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option("-s", "--seconds", dest="seconds", type="float", default=2.0, help="Seconds of audio per repeat")
+    parser.add_option("-r", "--repeats", dest="repeats", type="int", default=3, help="Repeats, the best is kept")
+    parser.add_option("-b", "--bank", dest="use_oscillator_bank", action="store_true", default=False, help="Render the voices with oscillator banks")
+    (options, args) = parser.parse_args()
+    # The synth logs every note and plan it compiles
+    logging.basicConfig(level=logging.WARNING)
+
+    for key, samples_per_second in run(seconds=options.seconds, repeats=options.repeats, use_oscillator_bank=options.use_oscillator_bank).items():
+        print(f"{key:>24} {samples_per_second / 1e6:>10.2f} Msamples/s {samples_per_second / sample_rate:>10.1f}x realtime")
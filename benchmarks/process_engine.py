@@ -0,0 +1,86 @@
+"""
+Throughput of the voice renderer versus the number of worker processes.
+Run from the repository root with: python -m benchmarks.process_engine
+"""
+import os
+import time
+from copy import deepcopy
+from optparse import OptionParser
+
+import numpy as np
+
+from synth.synthesis.process_engine import ProcessVoiceEngine
+from synth.synthesis.voice import Voice
+from synth.synthesis.signal.chain import Chain
+from synth.synthesis.signal.square_wave_oscillator import SquareWaveOscillator
+from synth.synthesis.signal.sawtooth_wave_oscillator import SawtoothWaveOscillator
+from synth.synthesis.signal.gain import Gain
+from synth.synthesis.signal.mixer import Mixer
+from synth.synthesis.signal.low_pass_filter import LowPassFilter
+from synth.synthesis.signal.envelope import Envelope
+
+
+def build_signal_chain(sample_rate, frames_per_chunk):
+    """The same patch as Synthesizer.setup_signal_chain."""
+    osc_a = SawtoothWaveOscillator(sample_rate, frames_per_chunk, band_limited=True)
+    osc_b = SquareWaveOscillator(sample_rate, frames_per_chunk, band_limited=True)
+    gain_a = Gain(sample_rate, frames_per_chunk, [osc_a], control_tag="gain_a")
+    gain_b = Gain(sample_rate, frames_per_chunk, [osc_b], control_tag="gain_b")
+    mixer = Mixer(sample_rate, frames_per_chunk, [gain_a, gain_b])
+    lpf = LowPassFilter(sample_rate, frames_per_chunk, [mixer], control_tag="lpf")
+    envelope = Envelope(sample_rate, frames_per_chunk, [lpf], control_tag="env")
+    return Chain(envelope)
+
+
+def render_in_process(prototype, num_voices, frames_per_chunk, num_chunks):
+    voices = [Voice(deepcopy(prototype)) for _ in range(num_voices)]
+    for i, voice in enumerate(voices):
+        voice.note_on(110.0 * 2 ** (i / 12), i)
+    out = np.zeros(frames_per_chunk, np.float32)
+    voice_output = np.zeros(frames_per_chunk, np.float32)
+    start = time.perf_counter()
+    for _ in range(num_chunks):
+        out.fill(0.0)
+        for voice in voices:
+            voice.signal_chain.render_into(voice_output)
+            out += voice_output
+    return time.perf_counter() - start
+
+
+def render_with_workers(prototype, sample_rate, num_voices, frames_per_chunk, num_chunks, num_workers):
+    engine = ProcessVoiceEngine(prototype, sample_rate, frames_per_chunk, num_voices, num_workers)
+    try:
+        for i, voice in enumerate(engine.voices):
+            voice.note_on(110.0 * 2 ** (i / 12), i)
+        out = np.zeros(frames_per_chunk, np.float32)
+        # The first chunk waits for the workers to start up
+        engine.render_into(out)
+        start = time.perf_counter()
+        for _ in range(num_chunks):
+            engine.render_into(out)
+        return time.perf_counter() - start
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option("-v", "--voices", dest="num_voices", type="int", default=32, help="Number of sounding voices")
+    parser.add_option("-c", "--chunks", dest="num_chunks", type="int", default=200, help="Number of chunks to render")
+    parser.add_option("-f", "--frames", dest="frames_per_chunk", type="int", default=1024, help="Frames per chunk")
+    parser.add_option("-w", "--max-workers", dest="max_workers", type="int", default=os.cpu_count(), help="Largest number of workers to try")
+    (options, args) = parser.parse_args()
+
+    sample_rate = 44100
+    prototype = build_signal_chain(sample_rate, options.frames_per_chunk)
+    audio_seconds = options.num_chunks * options.frames_per_chunk / sample_rate
+
+    print(f"{options.num_voices} voices, {options.num_chunks} chunks of {options.frames_per_chunk} frames ({audio_seconds:.2f}s of audio)")
+    print(f"{'workers':>8} {'seconds':>10} {'x realtime':>12}")
+    elapsed = render_in_process(prototype, options.num_voices, options.frames_per_chunk, options.num_chunks)
+    print(f"{0:>8} {elapsed:>10.3f} {audio_seconds / elapsed:>12.1f}")
+    num_workers = 1
+    while num_workers <= options.max_workers:
+        elapsed = render_with_workers(prototype, sample_rate, options.num_voices, options.frames_per_chunk, options.num_chunks, num_workers)
+        print(f"{num_workers:>8} {elapsed:>10.3f} {audio_seconds / elapsed:>12.1f}")
+        num_workers *= 2
@@ -0,0 +1,53 @@
+"""
+Throughput of the voice renderer versus the number of render threads.
+Run from the repository root with: python -m benchmarks.thread_engine
+"""
+import os
+import time
+from copy import deepcopy
+from optparse import OptionParser
+
+import numpy as np
+
+from synth.synthesis.thread_engine import ThreadVoiceEngine
+from synth.synthesis.voice import Voice
+from .process_engine import build_signal_chain, render_in_process
+
+
+def render_with_threads(prototype, num_voices, frames_per_chunk, num_chunks, num_threads, block_size):
+    voices = [Voice(deepcopy(prototype)) for _ in range(num_voices)]
+    engine = ThreadVoiceEngine(voices, frames_per_chunk, num_threads, block_size)
+    try:
+        for i, voice in enumerate(voices):
+            voice.note_on(110.0 * 2 ** (i / 12), i)
+        out = np.zeros(frames_per_chunk, np.float32)
+        start = time.perf_counter()
+        for _ in range(num_chunks):
+            engine.render_into(out)
+        return time.perf_counter() - start
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option("-v", "--voices", dest="num_voices", type="int", default=32, help="Number of sounding voices")
+    parser.add_option("-c", "--chunks", dest="num_chunks", type="int", default=200, help="Number of chunks to render")
+    parser.add_option("-f", "--frames", dest="frames_per_chunk", type="int", default=1024, help="Frames per chunk")
+    parser.add_option("-b", "--block-size", dest="block_size", type="int", default=0, help="Voices per task, 0 splits them evenly")
+    parser.add_option("-t", "--max-threads", dest="max_threads", type="int", default=os.cpu_count(), help="Largest number of threads to try")
+    (options, args) = parser.parse_args()
+
+    sample_rate = 44100
+    prototype = build_signal_chain(sample_rate, options.frames_per_chunk)
+    audio_seconds = options.num_chunks * options.frames_per_chunk / sample_rate
+
+    print(f"{options.num_voices} voices, {options.num_chunks} chunks of {options.frames_per_chunk} frames ({audio_seconds:.2f}s of audio)")
+    print(f"{'threads':>8} {'seconds':>10} {'x realtime':>12}")
+    elapsed = render_in_process(prototype, options.num_voices, options.frames_per_chunk, options.num_chunks)
+    print(f"{0:>8} {elapsed:>10.3f} {audio_seconds / elapsed:>12.1f}")
+    num_threads = 1
+    while num_threads <= options.max_threads:
+        elapsed = render_with_threads(prototype, options.num_voices, options.frames_per_chunk, options.num_chunks, num_threads, options.block_size)
+        print(f"{num_threads:>8} {elapsed:>10.3f} {audio_seconds / elapsed:>12.1f}")
+        num_threads *= 2
@@ -1,23 +1,36 @@
 import logging
 from time import sleep
 import queue
+import signal
 import sys
 from optparse import OptionParser
 
 import synth.settings as settings
 from synth.midi.midi_listener import MidiListener
+from synth.synthesis.scheduler import FrameClock
+from synth.synthesis.profiler import Profiler
+from synth.logging_setup import setup_logging
+from synth.midi.event_script import read_script
+from synth.playback.offline_sink import open_sink
 from .synthesizer import Synthesizer
 from . import midi
+from . import render
 
 
 if __name__ == "__main__":
+    # Records are formatted and printed by a background thread, so logging stays off the audio and control threads
+    setup_logging(settings.log_level, settings.log_rate_limits)
+
+    # python -m synth render file.mid ... renders MIDI files to WAV files in bulk
+    if sys.argv[1:2] == ["render"]:
+        sys.exit(render.main(sys.argv[2:]))
+
     parser = OptionParser()
-    parser.add_option("-p", "--port", dest="midi_port", default=None, help="MIDI port to listen on", metavar="MIDI_PORT")
+    parser.add_option("-p", "--port", dest="midi_ports", action="append", default=None, help="MIDI port to listen on. Can be given more than once", metavar="MIDI_PORT")
+    parser.add_option("-o", "--output", dest="output", default=None, help="Render offline to a .wav file, a raw float32 file or \"null\" instead of playing live", metavar="OUTPUT")
+    parser.add_option("-s", "--script", dest="script", default=None, help="Script of timestamped messages to render offline", metavar="SCRIPT")
+    parser.add_option("-d", "--duration", dest="duration", type="float", default=None, help="Seconds to render offline. Defaults to the end of the script plus 2 seconds", metavar="SECONDS")
     (options, args) = parser.parse_args()
-
-    logging.basicConfig(level=logging.DEBUG, 
-                        format='%(asctime)s [%(levelname)s] %(module)s [%(funcName)s]: %(message)s',
-                        datefmt='%Y-%m-%d %H:%M:%S')
     
     log = logging.getLogger(__name__)
     log.info(
@@ -42,16 +55,47 @@ if __name__ == "__main__":
         """
     )
 
+    profiler = Profiler(settings.sample_rate, settings.profile_interval) if settings.profile else None
+
+    if options.output is not None:
+        # Render the script as fast as possible, without audio or MIDI devices
+        events = read_script(options.script) if options.script else []
+        if options.duration is not None:
+            num_frames = int(options.duration * settings.sample_rate)
+        else:
+            num_frames = max((event.frame for event in events), default=0) + 2 * settings.sample_rate
+        synthesizer = Synthesizer(settings.sample_rate, settings.frames_per_chunk, queue.Queue(),
+                                  num_voices=settings.num_voices, use_oscillator_bank=settings.use_oscillator_bank,
+                                  voice_stealing=settings.voice_stealing, num_workers=settings.num_workers,
+                                  render_threads=settings.render_threads, thread_block_size=settings.thread_block_size,
+                                  output_sink=lambda generator: open_sink(options.output, settings.sample_rate, settings.frames_per_chunk, generator, num_frames),
+                                  profiler=profiler, profile_output=settings.profile_output, block_size=settings.block_size)
+        for event in events:
+            synthesizer.event_handler(event)
+        synthesizer.output_sink.play()
+        synthesizer.message_handler("exit")
+        sys.exit(0)
+
     available_ports = midi.get_available_controllers()
     log.info(f"Available MIDI ports: {available_ports}")
 
     listener_mailbox = queue.Queue()
     synth_mailbox = queue.Queue()
 
-    midi_listen_port = options.midi_port if options.midi_port else settings.auto_attach
-    log.info(f"Using MIDI port {midi_listen_port}")
-    midi_listener = MidiListener(listener_mailbox, synth_mailbox, midi_listen_port)
-    synthesizer = Synthesizer(settings.sample_rate, settings.frames_per_chunk, synth_mailbox)
+    midi_listen_ports = options.midi_ports if options.midi_ports else settings.auto_attach
+    log.info(f"Using MIDI ports {midi_listen_ports}")
+    # The listener stamps events with this clock so the synth can play them at the right frame
+    clock = FrameClock(settings.sample_rate)
+    midi_listener = MidiListener(listener_mailbox, synth_mailbox, midi_listen_ports, clock=clock, mode=settings.midi_input_mode)
+    synthesizer = Synthesizer(settings.sample_rate, settings.frames_per_chunk, synth_mailbox,
+                              num_voices=settings.num_voices, use_oscillator_bank=settings.use_oscillator_bank,
+                              voice_stealing=settings.voice_stealing, clock=clock,
+                              render_ahead=settings.render_ahead, num_workers=settings.num_workers,
+                              render_threads=settings.render_threads, thread_block_size=settings.thread_block_size,
+                              profiler=profiler, profile_output=settings.profile_output, block_size=settings.block_size)
+
+    # Stop cleanly when a supervisor sends SIGTERM, the same way as on ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
 
     try:
         midi_listener.start()
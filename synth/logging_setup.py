@@ -0,0 +1,97 @@
+import atexit
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+log_format = '%(asctime)s [%(levelname)s] %(module)s [%(funcName)s]: %(message)s'
+date_format = '%Y-%m-%d %H:%M:%S'
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    A QueueHandler that leaves formatting to the listener thread.
+    QueueHandler.prepare would % format every record on the thread that logged it, which is the audio or
+    control thread. Records are queued as they are, so their arguments must not be changed after they are logged.
+    """
+    def prepare(self, record):
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most rate_limits[subsystem] records per second through for each subsystem, the loggers under a name
+    like "synth.midi". Warnings and errors are never dropped. The number of dropped records is added to the next
+    record of the subsystem that gets through.
+    The filter keeps its counts without a lock, so it must only run on one thread. setup_logging puts it on the
+    listener's handler rather than on the queue handler, which runs on every thread that logs.
+    """
+    def __init__(self, rate_limits: dict):
+        super().__init__()
+        self.rate_limits = rate_limits
+        self._subsystems = {}
+        self._windows = {subsystem: [0.0, 0, 0] for subsystem in rate_limits} # window start, records, dropped
+
+    def subsystem(self, logger_name: str):
+        """
+        The most specific subsystem the logger belongs to, or None if it isn't rate limited.
+        """
+        if logger_name not in self._subsystems:
+            matches = [subsystem for subsystem in self.rate_limits
+                       if logger_name == subsystem or logger_name.startswith(subsystem + ".")]
+            self._subsystems[logger_name] = max(matches, key=len, default=None)
+        return self._subsystems[logger_name]
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or (subsystem := self.subsystem(record.name)) is None:
+            return True
+        window = self._windows[subsystem]
+        now = time.monotonic()
+        if now - window[0] >= 1.0:
+            window[0] = now
+            window[1] = 0
+        if window[1] >= self.rate_limits[subsystem]:
+            window[2] += 1
+            return False
+        window[1] += 1
+        if window[2]:
+            record.msg = f"{record.msg} ({window[2]} earlier messages from {subsystem} were dropped)"
+            window[2] = 0
+        return True
+
+
+class Lazy:
+    """
+    A log argument that calls function(*args) when the record is formatted, so an expensive message
+    is built on the listener thread instead of the thread that logged it.
+    """
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __str__(self):
+        return str(self.function(*self.args))
+
+
+def setup_logging(level="INFO", rate_limits: dict=None) -> QueueListener:
+    """
+    Send every record through a queue to a listener thread that formats and prints it.
+    Logging then costs the thread that logs little more than a queue put. The listener is flushed at exit.
+    Rate limits are applied on the listener thread, see RateLimitFilter.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(log_format, datefmt=date_format))
+    if rate_limits:
+        stream_handler.addFilter(RateLimitFilter(rate_limits))
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+
+    queue_handler = DeferredQueueHandler(log_queue)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,85 @@
+from enum import IntEnum
+from typing import NamedTuple
+
+from . import message_builder as mb
+
+class EventType(IntEnum):
+    NOTE_ON = 0
+    NOTE_OFF = 1
+    CONTROL_CHANGE = 2
+
+class Event(NamedTuple):
+    """
+    A note or CC event on its way from a MIDI source to the synth.
+
+    data1 is the note or CC number and data2 the velocity or CC value. frame is the frame time the event plays at;
+    0 plays it at the start of the next chunk. Events are plain tuples, so they are cheap to build on the MIDI
+    thread and to match on the synth side, and they pickle compactly.
+
+    The text messages of message_builder are kept as a readable form for scripts and debugging:
+    see from_message and to_message.
+    """
+    type: EventType
+    channel: int
+    data1: int
+    data2: int = 0
+    frame: int = 0
+
+    @classmethod
+    def from_mido(cls, msg, frame: int=0) -> 'Event':
+        """
+        Convert a mido message. Returns None for messages the synth doesn't play.
+        Note ons with velocity 0 are note offs.
+        """
+        match msg.type:
+            case "note_on" if msg.velocity > 0:
+                return cls(EventType.NOTE_ON, msg.channel, msg.note, msg.velocity, frame)
+            case "note_on" | "note_off":
+                return cls(EventType.NOTE_OFF, msg.channel, msg.note, 0, frame)
+            case "control_change":
+                return cls(EventType.CONTROL_CHANGE, msg.channel, msg.control, msg.value, frame)
+            case _:
+                return None
+
+    @classmethod
+    def from_message(cls, message: str) -> 'Event':
+        """
+        Parse a text message built by message_builder. Returns None if it isn't a note or CC message.
+        Raises ValueError if a number in it doesn't parse.
+        """
+        match message.split():
+            case ["note_on", "-n", note, "-c", channel, *timestamp]:
+                return cls(EventType.NOTE_ON, int(channel), int(note), 127, parse_frame(timestamp))
+            case ["note_off", "-n", note, "-c", channel, *timestamp]:
+                return cls(EventType.NOTE_OFF, int(channel), int(note), 0, parse_frame(timestamp))
+            case ["control_change", "-c", channel, "-n", cc_num, "-v", control_val, *timestamp]:
+                return cls(EventType.CONTROL_CHANGE, int(channel), int(cc_num), int(control_val), parse_frame(timestamp))
+            case _:
+                return None
+
+    def to_message(self) -> str:
+        """
+        The text message for the event, in the form message_builder builds.
+        """
+        match self.type:
+            case EventType.NOTE_ON:
+                builder = mb.builder().note_on().with_note(self.data1).on_channel(self.channel)
+            case EventType.NOTE_OFF:
+                builder = mb.builder().note_off().with_note(self.data1).on_channel(self.channel)
+            case EventType.CONTROL_CHANGE:
+                builder = mb.builder().control_change().on_channel(self.channel).with_control_num(self.data1).with_value(self.data2)
+        if self.frame:
+            builder = builder.at_frame(self.frame)
+        return builder.build()
+
+def parse_frame(timestamp: list) -> int:
+    """
+    Returns the frame time from the optional "-t <frame>" tail of a message, or 0 if there isn't one.
+    """
+    match timestamp:
+        case ["-t", frame]:
+            return int(frame)
+        case []:
+            return 0
+        case _:
+            raise ValueError(f"Couldn't parse timestamp {timestamp}")
@@ -0,0 +1,45 @@
+import logging
+
+import mido
+
+from .event import Event
+
+log = logging.getLogger(__name__)
+
+def read_script(path: str) -> list[Event]:
+    """
+    Read a script of synth messages for offline rendering.
+
+    Each line is a text message (see message_builder), stamped with the frame it plays at,
+    e.g. "note_on -n 60 -c 0 -t 22050". Lines without a stamp play at frame 0. Blank lines and lines
+    starting with # are skipped. Returns the events in the order they appear.
+    """
+    events = []
+    with open(path) as script:
+        for line_number, line in enumerate(script, start=1):
+            message = line.strip()
+            if not message or message.startswith("#"):
+                continue
+            try:
+                event = Event.from_message(message)
+            except ValueError as e:
+                log.error(f"Skipping line {line_number} of {path}: {e}")
+                continue
+            if event is None:
+                log.error(f"Skipping line {line_number} of {path}, it isn't a note or CC message: {message}")
+                continue
+            events.append(event)
+    return events
+
+def read_midi_file(path: str, sample_rate: int) -> list[Event]:
+    """
+    Read the note and CC events of a standard MIDI file, like read_script.
+    The tracks are merged and the tempo map is applied, so each event is stamped with the exact frame it plays at.
+    """
+    events = []
+    seconds = 0.0
+    for msg in mido.MidiFile(path):
+        seconds += msg.time
+        if event := Event.from_mido(msg, round(seconds * sample_rate)):
+            events.append(event)
+    return events
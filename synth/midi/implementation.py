@@ -1,7 +1,37 @@
 from enum import Enum
+from typing import NamedTuple
 
 class Implementation(Enum):
     OSCILLATOR_MIX = 70
     LPF_CUTOFF = 71
     DELAY_TIME = 72
-    DELAY_WET_GAIN = 73
\ No newline at end of file
+    DELAY_WET_GAIN = 73
+    ENVELOPE_ATTACK = 74
+    ENVELOPE_DECAY = 75
+    ENVELOPE_SUSTAIN = 76
+    ENVELOPE_RELEASE = 77
+
+class Route(NamedTuple):
+    """
+    Routes a CC to one parameter. The CC value (0-127) indexes the lookup table named by lookup
+    and the result is set on every component parameter registered under (control_tag, parameter).
+    """
+    control_tag: str
+    parameter: str
+    lookup: str
+
+# The default CC routing table. Maps a CC number to the routes it drives.
+# The lookup names refer to the 128 entry lookup tables built by the synthesizer.
+default_routes = {
+    Implementation.OSCILLATOR_MIX.value: [
+        Route("gain_a", "amp", "osc_mix_a_vals"),
+        Route("gain_b", "amp", "osc_mix_vals"),
+    ],
+    Implementation.LPF_CUTOFF.value: [Route("lpf", "cutoff_frequency", "lpf_cutoff_vals")],
+    Implementation.DELAY_TIME.value: [Route("delay", "delay_time", "delay_times")],
+    Implementation.DELAY_WET_GAIN.value: [Route("delay", "wet_gain", "delay_wet_gain_vals")],
+    Implementation.ENVELOPE_ATTACK.value: [Route("env", "attack", "envelope_times")],
+    Implementation.ENVELOPE_DECAY.value: [Route("env", "decay", "envelope_times")],
+    Implementation.ENVELOPE_SUSTAIN.value: [Route("env", "sustain", "envelope_sustain_vals")],
+    Implementation.ENVELOPE_RELEASE.value: [Route("env", "release", "envelope_times")],
+}
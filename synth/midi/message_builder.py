@@ -46,6 +46,7 @@ class CommandBuilder(MessageBuilder):
 class NoteParameterBuilder(MessageBuilder):
     """
     Note messages currently need to specify note and channel in that order.
+    They can optionally be stamped with the frame time of the event last.
     """
     def __init__(self, message_base: str) -> None:
         super().__init__()
@@ -75,9 +76,22 @@ class NoteParameterBuilder(MessageBuilder):
         
         return NoteParameterBuilder(self._message)
 
+    def at_frame(self, frame):
+        try:
+            int_val = int(frame)
+            if int_val < 0:
+                raise ValueError("Frame times can't be negative")
+            self._message += f" -t {int_val}"
+        except ValueError:
+            self.log.error(f"Unable to set frame: {frame}")
+            raise
+
+        return NoteParameterBuilder(self._message)
+
 class CCParameterBuilder(MessageBuilder):
     """
     Control Changes messages currently need to specify channel, control number, and value in that order.
+    They can optionally be stamped with the frame time of the event last.
     """
     def __init__(self, message_base: str) -> None:
         super().__init__()
@@ -117,4 +131,16 @@ class CCParameterBuilder(MessageBuilder):
             self.log.error(f"Unable to set channel: {value}")
             raise
 
+        return CCParameterBuilder(self._message)
+
+    def at_frame(self, frame):
+        try:
+            int_val = int(frame)
+            if int_val < 0:
+                raise ValueError("Frame times can't be negative")
+            self._message += f" -t {int_val}"
+        except ValueError:
+            self.log.error(f"Unable to set frame: {frame}")
+            raise
+
         return CCParameterBuilder(self._message)
\ No newline at end of file
@@ -4,61 +4,109 @@ import queue
 
 import mido
 
-from . import message_builder as mb
+from .event import Event
+from ..synthesis.scheduler import FrameClock
 
 class MidiListener(threading.Thread):
     """
-    Listens for MIDI messages on a given port and sends them to the synth mailbox.
+    Listens for MIDI messages on one or more ports and sends them to the synth mailbox as Events.
+    When a clock is given, every event is stamped with the frame time it was received at.
+
+    In "callback" mode, mido calls back on its own thread for every message, which is sent on straight away.
+    In "poll" mode, the listener wakes up every poll_interval seconds and sends everything that is pending on
+    every port as one batch (a list of Events).
+    Either way the listener thread waits on its mailbox, so it stops as soon as it gets the exit command.
     """
-    def __init__(self, thread_mailbox: queue.Queue, synth_mailbox: queue.Queue, port_name: str):
-        super().__init__(name=f"{port_name}-listener")
+    def __init__(self, thread_mailbox: queue.Queue, synth_mailbox: queue.Queue, port_names, clock: FrameClock=None, mode: str="callback", poll_interval: float=0.002):
+        """
+        port_names is the name of a port, or a list of them.
+        """
+        self.port_names = [port_names] if isinstance(port_names, str) else list(port_names)
+        super().__init__(name=f"{','.join(self.port_names)}-listener")
         self.log = logging.getLogger(__name__)
         self.thread_mailbox = thread_mailbox # The mailbox that receives commands from the main thread. Namely the 'exit' command to shut down gracefully.
         self.synth_mailbox = synth_mailbox # The OUT mailbox where we send the parsed commands to be played by the synth
-        self.port_name = port_name
-    
+        self.clock = clock
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self._ports = []
+
     def run(self):
-        should_run = True
-        inport = None
+        if self.mode not in ("callback", "poll"):
+            self.log.error(f"Unknown MIDI input mode {self.mode}. Closing the listener thread.")
+            return
+
+        for port_name in self.port_names:
+            try:
+                if self.mode == "callback":
+                    self._ports.append(mido.open_input(port_name, callback=self.receive))
+                else:
+                    self._ports.append(mido.open_input(port_name))
+                self.log.info(f"Opened port {port_name}")
+            except Exception as e:
+                self.log.error(f"Failed to open MIDI port at {port_name}: {e}")
 
-        try:
-            inport = mido.open_input(self.port_name)
-            self.log.info(f"Opened port {self.port_name}")
-        except:
-            self.log.error(f"Failed to open MIDI port at {self.port_name}. Closing the listener thread.")
-            should_run = False
+        if len(self._ports) == 0:
+            self.log.error("No MIDI ports could be opened. Closing the listener thread.")
+            return
 
+        should_run = True
         while should_run:
-            # Receive MIDI messages from the port and send them to the synth mailbox
-            if msg := inport.receive():
-                match msg.type:
-                    case "note_on":
-                        ctrl_msg = mb.builder().note_on().with_note(msg.note).on_channel(msg.channel).build()
-                        self.synth_mailbox.put(ctrl_msg)
-                    case "note_off":
-                        ctrl_msg = mb.builder().note_off().with_note(msg.note).on_channel(msg.channel).build()
-                        self.synth_mailbox.put(ctrl_msg)
-                    case "control_change":
-                        ctrl_msg = mb.builder().control_change().on_channel(msg.channel).with_control_num(msg.control).with_value(msg.value).build()
-                        self.synth_mailbox.put(ctrl_msg)
-                    case "stop":
-                        self.log.info(f"Received midi STOP message")
-                    case _:
-                        self.log.info(f"Matched unknown MIDI message: {msg}")
-            
-            # get_nowait raises queue.Empty exception if there is nothing in the queue
-            # We don't want to block this thread checking for thread command messages
+            if self.mode == "poll":
+                self.poll()
+            # Callbacks arrive on mido's thread, so in callback mode this thread only has to wait for commands
             try:
-                if mail := self.thread_mailbox.get_nowait():
-                    match mail.split():
-                        case ['exit']:
-                            self.log.info("Got exit command.")
-                            should_run = False
-                        case _:
-                            self.log.info(f"Matched unknown mailbox message: {mail}")
+                mail = self.thread_mailbox.get(timeout=self.poll_interval if self.mode == "poll" else None)
             except queue.Empty:
-                pass
+                continue
+            match mail.split():
+                case ['exit']:
+                    self.log.info("Got exit command.")
+                    should_run = False
+                case _:
+                    self.log.info(f"Matched unknown mailbox message: {mail}")
+
+        for port in self._ports:
+            port.close()
+        self._ports = []
+        return
+
+    def receive(self, msg):
+        """
+        Send one message to the synth. Called by mido for every message in callback mode.
+        """
+        if event := self.to_event(msg):
+            self.synth_mailbox.put(event)
+
+    def poll(self):
+        """
+        Send every message pending on any port to the synth in one batch.
+        """
+        batch = []
+        for port in self._ports:
+            for msg in port.iter_pending():
+                if event := self.to_event(msg):
+                    batch.append(event)
+        if batch:
+            self.synth_mailbox.put(batch)
+
+    def to_event(self, msg) -> Event:
+        """
+        Convert a MIDI message to an Event stamped with the current frame time. Returns None for other messages.
+        """
+        if event := Event.from_mido(msg, self.now()):
+            return event
+        if msg.type == "stop":
+            self.log.info(f"Received midi STOP message")
+        elif msg.type != "clock":
+            # Aftertouch and pitch wheel messages come in fast, so they are only formatted when debugging
+            self.log.debug("Matched unknown MIDI message: %s", msg)
+        return None
 
-        if inport is not None:
-            inport.close()
-        return
\ No newline at end of file
+    def now(self) -> int:
+        """
+        The current frame time to stamp events with, or 0 (play as soon as possible) if we have no clock.
+        """
+        if self.clock is None:
+            return 0
+        return self.clock.now()
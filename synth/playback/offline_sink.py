@@ -0,0 +1,123 @@
+import logging
+import time
+import wave
+
+import numpy as np
+
+from .output_sink import OutputSink
+
+class OfflineSink(OutputSink):
+    """
+    Renders num_frames frames from the input delegate as fast as the CPU allows, with no audio device.
+    play() blocks until the render is done, then reports how many times faster than real time it ran.
+    Subclasses decide what happens to each chunk by implementing write().
+    """
+    def __init__(self, sample_rate: int, frames_per_chunk: int, input_delegate, num_frames: int):
+        super().__init__(sample_rate, frames_per_chunk, input_delegate)
+        self.log = logging.getLogger(__name__)
+        self.num_frames = num_frames
+        self.frames_written = 0
+        self.elapsed = 0.0
+        self._active = False
+
+    @property
+    def realtime_factor(self):
+        """
+        Seconds of audio rendered per second of wall time.
+        """
+        if self.elapsed <= 0.0:
+            return 0.0
+        return self.frames_written / self.sample_rate / self.elapsed
+
+    def play(self):
+        """
+        Render every frame, then close the sink
+        """
+        self._active = True
+        start = time.perf_counter()
+        while self._active and self.frames_written < self.num_frames:
+            chunk = self.pull()
+            frames = min(len(chunk), self.num_frames - self.frames_written)
+            self.write(chunk[:frames])
+            self.frames_written += frames
+        self.elapsed = time.perf_counter() - start
+        self._active = False
+        self.close()
+        self.log.info(f"Rendered {self.frames_written / self.sample_rate:.2f}s of audio in {self.elapsed:.2f}s ({self.realtime_factor:.1f}x real time)")
+
+    def stop(self):
+        """
+        Stop rendering after the current chunk
+        """
+        self._active = False
+
+    def is_active(self):
+        return self._active
+
+    def write(self, chunk):
+        """
+        Consume one chunk of float32 frames. The chunk is reused, so it has to be copied if it is kept.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class NullSink(OfflineSink):
+    """
+    Throws the chunks away. Useful for measuring how fast the synth renders.
+    """
+    def write(self, chunk):
+        pass
+
+
+class RawSink(OfflineSink):
+    """
+    Writes the chunks to a file as raw native-endian float32 frames.
+    """
+    def __init__(self, sample_rate: int, frames_per_chunk: int, input_delegate, num_frames: int, path: str):
+        super().__init__(sample_rate, frames_per_chunk, input_delegate, num_frames)
+        self.path = path
+        self._file = open(path, "wb")
+
+    def write(self, chunk):
+        self._file.write(chunk.data)
+
+    def close(self):
+        self._file.close()
+
+
+class WavSink(OfflineSink):
+    """
+    Writes the chunks to a mono 16-bit PCM WAV file.
+    """
+    def __init__(self, sample_rate: int, frames_per_chunk: int, input_delegate, num_frames: int, path: str):
+        super().__init__(sample_rate, frames_per_chunk, input_delegate, num_frames)
+        self.path = path
+        self._pcm = np.zeros(frames_per_chunk, dtype=np.int16)
+        self._file = wave.open(path, "wb")
+        self._file.setnchannels(1)
+        self._file.setsampwidth(2)
+        self._file.setframerate(self.sample_rate)
+
+    def write(self, chunk):
+        if len(chunk) > len(self._pcm):
+            self._pcm = np.zeros(len(chunk), dtype=np.int16)
+        pcm = self._pcm[:len(chunk)]
+        np.multiply(chunk, 32767, out=pcm, casting="unsafe")
+        self._file.writeframes(pcm.data)
+
+    def close(self):
+        self._file.close()
+
+
+def open_sink(path: str, sample_rate: int, frames_per_chunk: int, input_delegate, num_frames: int) -> OfflineSink:
+    """
+    Pick an offline sink for path: "null" for a NullSink, a .wav file for a WavSink, anything else is written raw.
+    """
+    if path == "null":
+        return NullSink(sample_rate, frames_per_chunk, input_delegate, num_frames)
+    if path.lower().endswith(".wav"):
+        return WavSink(sample_rate, frames_per_chunk, input_delegate, num_frames, path)
+    return RawSink(sample_rate, frames_per_chunk, input_delegate, num_frames, path)
@@ -0,0 +1,111 @@
+import logging
+from abc import ABC, abstractmethod
+
+class OutputSink(ABC):
+    """
+    Somewhere the synthesizer's chunks go.
+    A sink pulls chunks of <frames_per_chunk> float32 frames from its input delegate once play() is called,
+    either at the pace of an audio device or as fast as they can be rendered.
+    """
+    def __init__(self, sample_rate: int, frames_per_chunk: int, input_delegate):
+        self.log = logging.getLogger(__name__)
+        self.sample_rate = sample_rate
+        self.frames_per_chunk = frames_per_chunk
+        self.input_delegate = input_delegate
+        self._started = False
+
+    @property
+    def sample_rate(self):
+        """
+        The sample rate of the audio stream.
+        This is the number of data points (frames) per second.
+        """
+        return self._sample_rate
+    
+    @sample_rate.setter
+    def sample_rate(self, value):
+        try:
+            if (int_value := int(value)) > 0:
+                self._sample_rate = int_value
+            else:
+                raise ValueError
+        except ValueError:
+            self.log.error(f"Couldn't set sample_rate with value {value}")
+
+    @property
+    def frames_per_chunk(self):
+        """
+        The size of the chunks of data that are passed to the output stream.
+        """
+        return self._frames_per_chunk
+    
+    @frames_per_chunk.setter
+    def frames_per_chunk(self, value):
+        try:
+            if (int_value := int(value)) > 0:
+                self._frames_per_chunk = int_value
+            else:
+                raise ValueError
+        except ValueError:
+            self.log.error(f"Couldn't set frames_per_chunk with value {value}")
+
+    @property
+    def input_delegate(self):
+        """
+        This should be an iterator which returns the BYTES of an ndarray (aka calling tobytes() on it)
+        of size <frames_per_chunk>
+        """
+        return self._input_delegate
+    
+    @input_delegate.setter
+    def input_delegate(self, value):
+        try:
+            _ = iter(value)
+            self._input_delegate = value
+        except TypeError:
+            self.log.error(f"Could not set input delegate with value {value}")
+
+    def start(self):
+        """
+        Start a generator input delegate that takes frame counts, like Synthesizer.generator, without rendering.
+        Its first step only yields an empty block. pull() starts it if it hasn't been.
+        """
+        if not self._started and hasattr(self.input_delegate, "send"):
+            next(self.input_delegate)
+        self._started = True
+
+    def pull(self, frames: int=None):
+        """
+        Get the next chunk from the input delegate.
+        Generators that take a frame count through send() are asked for frames frames, or their default size
+        if frames is None. Other iterators always give their own size.
+        """
+        if not hasattr(self.input_delegate, "send"):
+            return next(self.input_delegate)
+        self.start()
+        return self.input_delegate.send(frames)
+
+    @property
+    def xruns(self):
+        """
+        How many times the output ran out of audio. Only sinks that play in real time can run out.
+        """
+        return 0
+
+    @abstractmethod
+    def play(self):
+        """
+        Start pulling chunks from the input delegate
+        """
+
+    @abstractmethod
+    def stop(self):
+        """
+        Stop pulling chunks and release the sink
+        """
+
+    @abstractmethod
+    def is_active(self):
+        """
+        Whether the sink is still pulling chunks.
+        """
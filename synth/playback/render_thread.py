@@ -0,0 +1,36 @@
+import logging
+import threading
+import time
+
+from .ring_buffer import RingBuffer
+
+class RenderThread(threading.Thread):
+    """
+    Renders chunks from the player's input delegate into a ring buffer ahead of the audio callback.
+    The thread keeps the ring filled to the player's fill target, and sleeps for a fraction of a chunk when it is.
+    """
+    def __init__(self, ring_buffer: RingBuffer, player, sample_rate: int):
+        super().__init__(name="Render Thread", daemon=True)
+        self.log = logging.getLogger(__name__)
+        self.ring_buffer = ring_buffer
+        self.player = player
+        self.poll_interval = 0.25 * ring_buffer.frames_per_chunk / sample_rate
+        self.should_run = True
+
+    def run(self):
+        while self.should_run:
+            if self.ring_buffer.available < self.player.fill_target:
+                self.ring_buffer.write(self.player.pull(self.ring_buffer.frames_per_chunk))
+            else:
+                time.sleep(self.poll_interval)
+        return
+
+    def fill(self):
+        """
+        Fill the ring to the fill target on the calling thread, before the stream starts.
+        """
+        while self.ring_buffer.available < self.player.fill_target:
+            self.ring_buffer.write(self.player.pull(self.ring_buffer.frames_per_chunk))
+
+    def stop(self):
+        self.should_run = False
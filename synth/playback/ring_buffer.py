@@ -0,0 +1,47 @@
+import numpy as np
+
+class RingBuffer:
+    """
+    A single producer, single consumer ring of fixed size float32 chunks.
+
+    The producer only ever advances the write count and the consumer only ever advances the read count,
+    so neither side needs a lock. A chunk is copied in before the write count moves past it and copied out
+    before the read count moves past it. Copies out are plain byte copies between memoryviews.
+    """
+    def __init__(self, num_slots: int, frames_per_chunk: int):
+        self.num_slots = num_slots
+        self.frames_per_chunk = frames_per_chunk
+        self._slots = np.zeros((num_slots, frames_per_chunk), np.float32)
+        self._slot_views = [memoryview(slot).cast("B") for slot in self._slots]
+        self._write_count = 0
+        self._read_count = 0
+
+    @property
+    def available(self):
+        """The number of chunks that have been written and not read yet"""
+        return self._write_count - self._read_count
+
+    @property
+    def free(self):
+        """The number of chunks that can be written before the ring is full"""
+        return self.num_slots - self.available
+
+    def write(self, chunk) -> bool:
+        """
+        Copy a chunk into the ring. Returns False without copying if the ring is full.
+        """
+        if self.free == 0:
+            return False
+        np.copyto(self._slots[self._write_count % self.num_slots], chunk)
+        self._write_count += 1
+        return True
+
+    def read_into(self, out: memoryview) -> bool:
+        """
+        Copy the oldest chunk into out, a byte memoryview of a float32 buffer. Returns False if the ring is empty.
+        """
+        if self.available == 0:
+            return False
+        out[:] = self._slot_views[self._read_count % self.num_slots]
+        self._read_count += 1
+        return True
@@ -1,71 +1,68 @@
 import pyaudio
 import logging
 
-class StreamPlayer:
-    def __init__(self, sample_rate: int, frames_per_chunk: int, input_delegate):
+import numpy as np
+
+from .output_sink import OutputSink
+from .ring_buffer import RingBuffer
+from .render_thread import RenderThread
+
+class StreamPlayer(OutputSink):
+    """
+    Plays the chunks from the input delegate on the default output device.
+
+    By default the audio callback pulls each chunk straight from the input delegate, so rendering has to fit in
+    the callback's deadline. With render_ahead > 0 a render thread keeps that many chunks ready in a ring buffer
+    and the callback copies the frames the device asks for out of them. The device doesn't have to ask for whole
+    chunks: what's left of a chunk is played at the start of the next callback. Every time the ring runs dry the
+    callback plays silence for the rest of its frames, counts an
+    underrun and, if adaptive, raises the fill target by a chunk, up to max_render_ahead. After
+    adaptive_decay_chunks chunks without an underrun the target steps back down towards render_ahead.
+    """
+    adaptive_decay_chunks = 1000
+
+    def __init__(self, sample_rate: int, frames_per_chunk: int, input_delegate, render_ahead: int=0, max_render_ahead: int=8, adaptive: bool=True):
+        super().__init__(sample_rate, frames_per_chunk, input_delegate)
         self.log = logging.getLogger(__name__)
-        self.sample_rate = sample_rate
-        self.frames_per_chunk = frames_per_chunk
-        self.input_delegate = input_delegate
+        self.render_ahead = render_ahead
+        self.max_render_ahead = max(max_render_ahead, render_ahead)
+        self.adaptive = adaptive
+        self.fill_target = render_ahead
+        self.underruns = 0
+        self.output_underflows = 0
+        self._chunks_since_underrun = 0
         self.pyaudio_interface = pyaudio.PyAudio()
         self._output_stream = None
+        self._ring_buffer = None
+        self._render_thread = None
 
     @property
-    def sample_rate(self):
-        """
-        The sample rate of the audio stream.
-        This is the number of data points (frames) per second.
-        """
-        return self._sample_rate
-    
-    @sample_rate.setter
-    def sample_rate(self, value):
-        try:
-            if (int_value := int(value)) > 0:
-                self._sample_rate = int_value
-            else:
-                raise ValueError
-        except ValueError:
-            self.log.error(f"Couldn't set sample_rate with value {value}")
-
-    @property
-    def frames_per_chunk(self):
+    def xruns(self):
         """
-        The size of the chunks of data that are passed to the output stream.
+        Chunks the device played silence for: ring buffer underruns plus underflows reported by the device.
         """
-        return self._frames_per_chunk
-    
-    @frames_per_chunk.setter
-    def frames_per_chunk(self, value):
-        try:
-            if (int_value := int(value)) > 0:
-                self._frames_per_chunk = int_value
-            else:
-                raise ValueError
-        except ValueError:
-            self.log.error(f"Couldn't set frames_per_chunk with value {value}")
-
-    @property
-    def input_delegate(self):
-        """
-        This should be an iterator which returns the BYTES of an ndarray (aka calling tobytes() on it)
-        of size <frames_per_chunk>
-        """
-        return self._input_delegate
-    
-    @input_delegate.setter
-    def input_delegate(self, value):
-        try:
-            _ = iter(value)
-            self._input_delegate = value
-        except TypeError:
-            self.log.error(f"Could not set input delegate with value {value}")
-
+        return self.underruns + self.output_underflows
 
     def play(self):
         """
         Start the output stream
         """
+        if self.render_ahead > 0 and self._render_thread is None:
+            self._ring_buffer = RingBuffer(self.max_render_ahead, self.frames_per_chunk)
+            self._callback_buffer = np.zeros(self.frames_per_chunk, np.float32)
+            self._callback_view = memoryview(self._callback_buffer).cast("B")
+            # The frames of the callback buffer that have been played. It starts out played, so the first callback reads
+            self._callback_offset = self.frames_per_chunk
+            self._callback_output = np.zeros(self.frames_per_chunk, np.float32)
+            self._render_thread = RenderThread(self._ring_buffer, self, self.sample_rate)
+            self._render_thread.fill()
+            self._render_thread.start()
+
+        if self._render_thread is None:
+            # Start the input generator, so the callback can ask it for the number of frames the device wants.
+            # Starting it renders nothing, so no block is thrown away and no scheduled event is used up
+            self.start()
+
         if self._output_stream is None:
             self._output_stream = self.pyaudio_interface.open(format = pyaudio.paFloat32,
                                                               channels = 1,
@@ -80,6 +77,12 @@ class StreamPlayer:
         """
         Stop the output stream
         """
+        if self._render_thread is not None:
+            self._render_thread.stop()
+            self._render_thread.join()
+            self._render_thread = None
+            self.log.info(f"Stopped rendering ahead. Underruns: {self.underruns}, final fill target: {self.fill_target} chunks")
+
         if self._output_stream is None:
             return
         else:
@@ -91,8 +94,49 @@ class StreamPlayer:
         """
         The audio callback is called by the pyaudio interface when it needs more data.
         """
-        frames = next(self.input_delegate)
-        return (frames, pyaudio.paContinue)
+        if status & pyaudio.paOutputUnderflow:
+            self.output_underflows += 1
+
+        if self._ring_buffer is None:
+            frames = self.pull(frame_count)
+            return (frames, pyaudio.paContinue)
+
+        return (self.read_ring(frame_count), pyaudio.paContinue)
+
+    def read_ring(self, frame_count: int):
+        """
+        Copy frame_count frames out of the ring buffer, reading as many chunks as that takes.
+        If the ring runs dry the rest of the frames are silent.
+        """
+        if frame_count > len(self._callback_output):
+            self._callback_output = np.zeros(frame_count, np.float32)
+        out = self._callback_output[:frame_count]
+        filled = 0
+        while filled < frame_count:
+            if self._callback_offset == self.frames_per_chunk:
+                if not self._ring_buffer.read_into(self._callback_view):
+                    out[filled:] = 0.0
+                    self.underrun()
+                    break
+                self._callback_offset = 0
+                self._chunks_since_underrun += 1
+                if self.adaptive and self._chunks_since_underrun >= self.adaptive_decay_chunks and self.fill_target > self.render_ahead:
+                    self.fill_target -= 1
+                    self._chunks_since_underrun = 0
+            frames = min(frame_count - filled, self.frames_per_chunk - self._callback_offset)
+            out[filled:filled + frames] = self._callback_buffer[self._callback_offset:self._callback_offset + frames]
+            filled += frames
+            self._callback_offset += frames
+        return out
+
+    def underrun(self):
+        """
+        Count an underrun and, if adaptive, render further ahead.
+        """
+        self.underruns += 1
+        self._chunks_since_underrun = 0
+        if self.adaptive and self.fill_target < self.max_render_ahead:
+            self.fill_target += 1
     
     def is_active(self):
         """
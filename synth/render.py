@@ -0,0 +1,80 @@
+import logging
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from optparse import OptionParser
+
+import synth.settings as settings
+from .midi.event_script import read_midi_file
+from .playback.offline_sink import WavSink
+from .synthesizer import Synthesizer
+from .logging_setup import log_format, date_format
+
+log = logging.getLogger(__name__)
+
+def render_file(midi_path: str, wav_path: str, tail: float) -> tuple[float, float]:
+    """
+    Render a MIDI file to a WAV file with the synth settings, tail seconds past its last event.
+    Returns the seconds of audio rendered and the seconds it took.
+    """
+    events = read_midi_file(midi_path, settings.sample_rate)
+    num_frames = max((event.frame for event in events), default=0) + int(tail * settings.sample_rate)
+    # Files are rendered in parallel by the pool, so each one renders its voices on a single core
+    synthesizer = Synthesizer(settings.sample_rate, settings.frames_per_chunk, queue.Queue(),
+                              num_voices=settings.num_voices, use_oscillator_bank=settings.use_oscillator_bank,
+                              voice_stealing=settings.voice_stealing,
+                              output_sink=lambda generator: WavSink(settings.sample_rate, settings.frames_per_chunk, generator, num_frames, wav_path))
+    for event in events:
+        synthesizer.event_handler(event)
+    synthesizer.output_sink.play()
+    return synthesizer.output_sink.frames_written / settings.sample_rate, synthesizer.output_sink.elapsed
+
+def quiet_worker():
+    """
+    The synth logs every note, which would drown out the progress of a batch.
+    """
+    logging.basicConfig(level=logging.WARNING, format=log_format, datefmt=date_format, force=True)
+
+def main(args: list[str]) -> int:
+    """
+    Render MIDI files to WAV files in parallel, one file per process.
+    """
+    parser = OptionParser(usage="python -m synth render [options] file.mid [file.mid ...]")
+    parser.add_option("-o", "--output-dir", dest="output_dir", default=None, help="Directory to write the WAV files to. Defaults to next to each MIDI file", metavar="DIR")
+    parser.add_option("-j", "--jobs", dest="jobs", type="int", default=os.cpu_count(), help="Number of files to render at once", metavar="JOBS")
+    parser.add_option("-t", "--tail", dest="tail", type="float", default=2.0, help="Seconds to render past the last event", metavar="SECONDS")
+    (options, midi_paths) = parser.parse_args(args)
+    if not midi_paths:
+        parser.error("no MIDI files given")
+
+    if options.output_dir is not None:
+        os.makedirs(options.output_dir, exist_ok=True)
+    jobs = {}
+    sources = {}
+    for midi_path in midi_paths:
+        wav_name = os.path.splitext(os.path.basename(midi_path))[0] + ".wav"
+        wav_path = os.path.join(options.output_dir or os.path.dirname(midi_path), wav_name)
+        # Files with the same name in different directories would overwrite each other's WAV file
+        key = os.path.normcase(os.path.abspath(wav_path))
+        if sources.setdefault(key, midi_path) != midi_path:
+            parser.error(f"{sources[key]} and {midi_path} would both be rendered to {wav_path}")
+        jobs[midi_path] = wav_path
+
+    failures = 0
+    start = time.perf_counter()
+    total_audio_seconds = 0.0
+    with ProcessPoolExecutor(max_workers=max(1, options.jobs), initializer=quiet_worker) as pool:
+        futures = {pool.submit(render_file, midi_path, wav_path, options.tail): midi_path for midi_path, wav_path in jobs.items()}
+        for future in as_completed(futures):
+            midi_path = futures[future]
+            try:
+                audio_seconds, elapsed = future.result()
+                total_audio_seconds += audio_seconds
+                log.info(f"Rendered {midi_path} to {jobs[midi_path]}: {audio_seconds:.2f}s of audio in {elapsed:.2f}s ({audio_seconds / max(elapsed, 1e-9):.1f}x real time)")
+            except Exception as e:
+                failures += 1
+                log.error(f"Failed to render {midi_path}: {type(e).__name__} {e}")
+    elapsed = time.perf_counter() - start
+    log.info(f"Rendered {len(jobs) - failures} of {len(jobs)} files, {total_audio_seconds:.2f}s of audio in {elapsed:.2f}s ({total_audio_seconds / max(elapsed, 1e-9):.1f}x real time)")
+    return 1 if failures else 0
@@ -1,3 +1,17 @@
 sample_rate = 44100
-frames_per_chunk = 1024
-auto_attach = "MPK mini 3 1"
\ No newline at end of file
+frames_per_chunk = 1024 # the largest block the voices render in one pass
+block_size = 1024 # frames per block. Smaller blocks lower the latency, bigger blocks render more efficiently
+num_voices = 4
+use_oscillator_bank = False
+voice_stealing = "oldest" # oldest, quietest or retrigger
+num_workers = 0 # worker processes to render the voices in. 0 renders them in the synthesizer process
+render_threads = 0 # threads to render the voices on. 0 renders them on the audio thread
+thread_block_size = 0 # voices rendered by one thread pool task. 0 splits them evenly between the threads
+profile = False # time every chunk and component, and log the DSP load
+profile_interval = 10.0 # seconds between profile reports. 0 only reports on exit
+profile_output = "profile.folded" # folded stacks written on exit, for flame graph tools
+render_ahead = 0 # chunks to render ahead of the audio callback on a separate thread. 0 renders inside the callback
+log_level = "INFO" # DEBUG also logs every parameter a CC sets
+log_rate_limits = {"synth.synthesizer": 50, "synth.midi": 50, "synth.synthesis": 20} # most records per second from each subsystem
+midi_input_mode = "callback" # callback: handle each message as it arrives. poll: handle them in batches every couple of milliseconds
+auto_attach = "MPK mini 3 1" # a port name, or a list of them
\ No newline at end of file
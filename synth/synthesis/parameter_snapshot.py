@@ -0,0 +1,72 @@
+import logging
+import threading
+
+from .signal.parameter_registry import ParameterRegistry, prepare_setter
+
+class ParameterSnapshot:
+    """
+    Double-buffered parameter changes, handed from the control side to the audio side.
+
+    The control side writes values into the back buffer, either for the whole synth or for one voice, keyed by
+    (voice, control tag, parameter). Writing prepares the value (see Component.prepare), so filter coefficients,
+    envelope tables and the like are built on the control side. The audio side calls apply() at the start of every
+    block it renders: it swaps the buffers with a single reference swap and switches to the prepared state.
+    Writes between two swaps coalesce, so a dense stream of CCs costs the audio side a few assignments per parameter
+    per block, and the control side does all the routing, lookups and computation. The lock only guards the swap
+    against a concurrent write, so it is never held for long.
+    """
+    def __init__(self, parameters: ParameterRegistry, voice_parameters: list[ParameterRegistry]=()):
+        """
+        parameters holds the setters of the whole synth. voice_parameters holds the setters of each voice,
+        for voices that have parameters of their own.
+        """
+        self.log = logging.getLogger(__name__)
+        self.parameters = parameters
+        self.voice_parameters = list(voice_parameters)
+        self._lock = threading.Lock()
+        self._back = {}
+        self._front = {}
+
+    def set(self, control_tag: str, parameter: str, value, voice: int=None):
+        """
+        Set a parameter at the start of the next block. With a voice index, only that voice's parameter is set.
+        """
+        if voice is None:
+            setters = self.parameters.get_setters(control_tag, parameter)
+        elif 0 <= voice < len(self.voice_parameters):
+            setters = self.voice_parameters[voice].get_setters(control_tag, parameter)
+        else:
+            self.log.error(f"Couldn't set {control_tag}.{parameter} on voice {voice}, there's no such voice")
+            return
+        self.write((voice, control_tag, parameter), setters, value)
+
+    def write(self, key, setters, value):
+        """
+        Prepare a value for already resolved setters and write it. A later write with the same key replaces it.
+        """
+        appliers = self.prepare(setters, value)
+        with self._lock:
+            # The latest write is applied last. Some prepared state, like an envelope table, depends on the
+            # component's other parameters, so it has to win over writes prepared before it
+            self._back.pop(key, None)
+            self._back[key] = appliers
+
+    @staticmethod
+    def prepare(setters, value):
+        """
+        Prepare value for every setter. Returns the functions that apply it, skipping setters that rejected it.
+        """
+        return [applier for setter in setters if (applier := prepare_setter(setter, value)) is not None]
+
+    def apply(self):
+        """
+        Swap in the values written since the last call and apply them. Called by the audio side between blocks.
+        """
+        if not self._back:
+            return
+        with self._lock:
+            self._front, self._back = self._back, self._front
+        for appliers in self._front.values():
+            for applier in appliers:
+                applier()
+        self._front.clear()
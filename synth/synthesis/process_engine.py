@@ -0,0 +1,318 @@
+import logging
+import multiprocessing as mp
+import time
+from copy import deepcopy
+from functools import partial
+from threading import BrokenBarrierError
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .signal.chain import Chain
+from .signal.parameter_registry import ParameterRegistry
+from .voice import Voice
+
+class RemoteVoice:
+    """
+    Stands in for a voice that lives in a worker process.
+    Note events are queued on the engine and sent to the worker with the next chunk. The level of the voice
+    is read from shared memory, where the worker writes it after every chunk.
+    """
+    def __init__(self, engine: 'ProcessVoiceEngine', worker: int, local_index: int, index: int):
+        self.engine = engine
+        self.worker = worker
+        self.local_index = local_index
+        self.index = index
+        self.note_id = None
+        self._active = False
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def level(self):
+        return float(self.engine.levels[self.index])
+
+    @property
+    def idle(self):
+        return bool(self.engine.idle[self.index])
+
+    def note_on(self, frequency, id):
+        self._active = True
+        self.note_id = id
+        self.engine.idle[self.index] = False
+        self.engine.post(self.worker, ("note_on", self.local_index, frequency, id))
+
+    def note_off(self):
+        self._active = False
+        self.engine.post(self.worker, ("note_off", self.local_index))
+
+
+class RemoteParameterSetter:
+    """
+    Sets a parameter of the voices in the workers. See ProcessVoiceEngine.prepare_parameter.
+    """
+    __slots__ = ("engine", "control_tag", "parameter")
+
+    def __init__(self, engine: 'ProcessVoiceEngine', control_tag: str, parameter: str):
+        self.engine = engine
+        self.control_tag = control_tag
+        self.parameter = parameter
+
+    def __call__(self, value):
+        if (applier := self.prepare(value)) is not None:
+            applier()
+
+    def prepare(self, value):
+        """
+        Returns a function of no arguments that sends the prepared value to the workers, or None if it is invalid.
+        """
+        try:
+            prepared = self.engine.prepare_parameter(self.control_tag, self.parameter, value)
+        except ValueError as e:
+            self.engine.log.error(f"Couldn't set {self.control_tag}.{self.parameter} with value {value}: {e}")
+            return None
+        return partial(self.engine.apply_parameter, self.control_tag, self.parameter, prepared)
+
+
+class ProcessVoiceEngine:
+    """
+    Renders voices in worker processes so polyphony isn't limited to the one core the GIL gives us.
+
+    The voices are split evenly across num_workers processes. Each worker builds its voices from the signal chain
+    prototype and renders their sum into its own row of a shared memory block. Every chunk, the parent sends each
+    worker the note and parameter events queued for it, the workers render, and everyone meets at a barrier.
+    The parent then sums the rows.
+
+    Parameter changes are prepared in the parent with the components of the prototype, which every worker's voices
+    were copied from, and the workers are sent the prepared state. The filter designs and envelope tables are
+    cached in the parent's process, so workers never build them while rendering a chunk.
+
+    The engine never waits on a worker forever. Each worker reports that it is ready when it has built its voices,
+    and the constructor raises RuntimeError if one dies or isn't ready within startup_timeout seconds.
+    While rendering, the barrier is waited on for at most render_timeout seconds. If it breaks or a worker has
+    died, the engine closes itself and raises RuntimeError.
+    """
+    startup_timeout = 30.0
+    render_timeout = 1.0
+
+    def __init__(self, signal_chain_prototype: Chain, sample_rate: int, frames_per_chunk: int, num_voices: int, num_workers: int):
+        self.log = logging.getLogger(__name__)
+        self.sample_rate = sample_rate
+        self.frames_per_chunk = frames_per_chunk
+        self.num_voices = num_voices
+        self.num_workers = max(1, min(num_workers, num_voices))
+        self.parameter_keys = list(signal_chain_prototype.parameters.keys())
+        self._prototype_parameters = signal_chain_prototype.parameters
+
+        # Spawn rather than fork, so workers don't inherit the audio and MIDI threads
+        context = mp.get_context("spawn")
+        self._outputs_memory = shared_memory.SharedMemory(create=True, size=self.num_workers * self.frames_per_chunk * 4)
+        self._levels_memory = shared_memory.SharedMemory(create=True, size=self.num_voices * 4)
+        self._idle_memory = shared_memory.SharedMemory(create=True, size=self.num_voices)
+        self.outputs = np.ndarray((self.num_workers, self.frames_per_chunk), np.float32, buffer=self._outputs_memory.buf)
+        self.levels = np.ndarray(self.num_voices, np.float32, buffer=self._levels_memory.buf)
+        self.idle = np.ndarray(self.num_voices, np.bool_, buffer=self._idle_memory.buf)
+        self.outputs.fill(0.0)
+        self.levels.fill(0.0)
+        self.idle.fill(True)
+        self._barrier = context.Barrier(self.num_workers + 1)
+
+        self.voices = []
+        self._connections = []
+        self._workers = []
+        self._pending_events = [[] for _ in range(self.num_workers)]
+        for worker, voice_indices in enumerate(np.array_split(np.arange(self.num_voices), self.num_workers)):
+            voice_indices = [int(i) for i in voice_indices]
+            self.voices.extend(RemoteVoice(self, worker, local_index, index) for local_index, index in enumerate(voice_indices))
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=run_worker, name=f"Voice Worker {worker}", daemon=True,
+                                      args=(child_connection, self._barrier, worker, voice_indices,
+                                            self._outputs_memory.name, self._levels_memory.name, self._idle_memory.name,
+                                            self.num_workers, self.num_voices, self.frames_per_chunk))
+            process.start()
+            # Only the worker holds its end, so the parent's sends fail rather than block once it has died
+            child_connection.close()
+            self._connections.append(parent_connection)
+            self._workers.append(process)
+        self._closed = False
+        try:
+            self.wait_until_ready(signal_chain_prototype)
+        except RuntimeError:
+            self.close()
+            raise
+        self.log.info(f"Started {self.num_workers} voice workers for {self.num_voices} voices")
+
+    def wait_until_ready(self, signal_chain_prototype: Chain):
+        """
+        Send every worker the signal chain prototype and wait for it to report that it built its voices.
+        Raises RuntimeError if one fails, dies or takes longer than startup_timeout.
+        The prototype goes over the worker's connection rather than the process arguments: those are written
+        to the worker before it starts, and the write blocks forever if it dies before reading them.
+        """
+        deadline = time.monotonic() + self.startup_timeout
+        for connection, process in zip(self._connections, self._workers):
+            try:
+                connection.send(signal_chain_prototype)
+            except OSError:
+                raise RuntimeError(f"{process.name} exited with code {process.exitcode} before it was ready")
+        for connection, process in zip(self._connections, self._workers):
+            while not connection.poll(0.05):
+                if not process.is_alive():
+                    raise RuntimeError(f"{process.name} exited with code {process.exitcode} before it was ready")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{process.name} wasn't ready after {self.startup_timeout}s")
+            try:
+                status = connection.recv()
+            except (EOFError, OSError):
+                status = ("failed", "it closed its connection")
+            if status != ("ready",):
+                raise RuntimeError(f"{process.name} failed to start: {status[1]}")
+
+    def post(self, worker: int, event: tuple):
+        """
+        Queue an event for a worker. It is sent with the next chunk.
+        """
+        self._pending_events[worker].append(event)
+
+    def set_parameter(self, control_tag: str, parameter: str, value):
+        """
+        Broadcast a parameter change to every worker.
+        """
+        RemoteParameterSetter(self, control_tag, parameter)(value)
+
+    def prepare_parameter(self, control_tag: str, parameter: str, value) -> list:
+        """
+        Prepare value for every component with the parameter in the prototype, in registry order (see
+        Component.prepare). Raises ValueError if a component rejects it.
+        """
+        return [setter.component.prepare(setter.parameter, value)
+                for setter in self._prototype_parameters.get_setters(control_tag, parameter)]
+
+    def apply_parameter(self, control_tag: str, parameter: str, prepared: list):
+        """
+        Broadcast prepared state from prepare_parameter to every worker.
+        """
+        event = ("apply", control_tag, parameter, prepared)
+        for worker in range(self.num_workers):
+            self.post(worker, event)
+
+    def register_parameters(self, parameters: ParameterRegistry):
+        """
+        Register a setter for every parameter of the voices, so CCs reach the workers through the registry.
+        """
+        for control_tag, parameter in self.parameter_keys:
+            parameters.add_setter(control_tag, parameter, RemoteParameterSetter(self, control_tag, parameter))
+
+    def render_into(self, out):
+        """
+        Render the sum of all voices into out, which may be part of a chunk.
+        """
+        if self._closed:
+            raise RuntimeError("The voice workers have been closed")
+        frames = out.shape[-1]
+        try:
+            for worker, connection in enumerate(self._connections):
+                connection.send((frames, self._pending_events[worker]))
+                self._pending_events[worker] = []
+            self._barrier.wait(self.render_timeout)
+        except (BrokenBarrierError, OSError) as e:
+            dead = [process.name for process in self._workers if not process.is_alive()]
+            self.close()
+            reason = f"{', '.join(dead)} died" if dead else f"the workers didn't render within {self.render_timeout}s"
+            raise RuntimeError(f"Voice rendering failed, {reason}") from e
+        np.sum(self.outputs[:, :frames], axis=0, out=out)
+
+    def close(self):
+        """
+        Stop the workers and release the shared memory. Closing twice does nothing.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        # Workers stuck at the barrier get a BrokenBarrierError and exit
+        self._barrier.abort()
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+        for process in self._workers:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        self._connections = []
+        self._workers = []
+        del self.outputs, self.levels, self.idle
+        for memory in (self._outputs_memory, self._levels_memory, self._idle_memory):
+            memory.close()
+            memory.unlink()
+
+
+def run_worker(connection, barrier, worker: int, voice_indices: list, outputs_name: str, levels_name: str, idle_name: str, num_workers: int, num_voices: int, frames_per_chunk: int):
+    """
+    The main loop of a voice worker process. Renders the worker's voices every time the parent sends a chunk's events.
+    """
+    outputs_memory = shared_memory.SharedMemory(name=outputs_name)
+    levels_memory = shared_memory.SharedMemory(name=levels_name)
+    idle_memory = shared_memory.SharedMemory(name=idle_name)
+    output = np.ndarray((num_workers, frames_per_chunk), np.float32, buffer=outputs_memory.buf)[worker]
+    levels = np.ndarray(num_voices, np.float32, buffer=levels_memory.buf)
+    idle = np.ndarray(num_voices, np.bool_, buffer=idle_memory.buf)
+
+    try:
+        signal_chain_prototype = connection.recv()
+        voices = [Voice(deepcopy(signal_chain_prototype)) for _ in voice_indices]
+        voice_output = np.zeros(frames_per_chunk, np.float32)
+    except Exception as e:
+        # Break the barrier too, so nobody waits on a worker that will never get there
+        barrier.abort()
+        connection.send(("failed", f"{type(e).__name__}: {e}"))
+        voices = None
+    else:
+        connection.send(("ready",))
+
+    while voices is not None and (message := receive(connection)) is not None:
+        frames, events = message
+        for event in events:
+            match event:
+                case ("note_on", local_index, frequency, note_id):
+                    voices[local_index].note_on(frequency, note_id)
+                case ("note_off", local_index):
+                    voices[local_index].note_off()
+                case ("apply", control_tag, parameter, prepared):
+                    # Every voice's setters are in the same order as the prototype's, which prepared the state
+                    for voice in voices:
+                        for setter, state in zip(voice.signal_chain.parameters.get_setters(control_tag, parameter), prepared):
+                            setter.component.apply(setter.parameter, state)
+
+        out = output[:frames]
+        out.fill(0.0)
+        for voice, index in zip(voices, voice_indices):
+            if voice.idle:
+                continue
+            voice.signal_chain.render_into(voice_output[:frames])
+            voice.update_activity(voice_output[:frames])
+            out += voice_output[:frames]
+            levels[index] = voice.level
+            idle[index] = voice.idle
+        try:
+            barrier.wait()
+        except BrokenBarrierError:
+            # The parent gave up on this chunk, or is closing
+            break
+
+    del output, levels, idle
+    for memory in (outputs_memory, levels_memory, idle_memory):
+        memory.close()
+
+
+def receive(connection):
+    """
+    The next message from the parent, or None if the parent asked the worker to stop or has gone away.
+    """
+    try:
+        return connection.recv()
+    except (EOFError, OSError):
+        return None
@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+from time import perf_counter_ns
+
+class Histogram:
+    """
+    A fixed-size histogram of durations in nanoseconds, with one bucket per power of two.
+    Recording is a couple of integer operations, so it can run on every op of every chunk.
+    """
+    num_buckets = 48
+
+    def __init__(self):
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns: int):
+        self.counts[min(ns.bit_length(), self.num_buckets - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, fraction: float) -> int:
+        """
+        An upper bound on the given percentile (0-1) in nanoseconds, accurate to the bucket (a factor of 2).
+        """
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(1 << bucket, self.max_ns)
+        return self.max_ns
+
+    def copy(self) -> 'Histogram':
+        histogram = Histogram()
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.total_ns = self.total_ns
+        histogram.max_ns = self.max_ns
+        return histogram
+
+    def add(self, other: 'Histogram'):
+        """
+        Add the durations recorded by another histogram to this one.
+        """
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+    def reset(self):
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+
+class Profiler:
+    """
+    Opt-in timing of the synth's DSP.
+
+    Chains that are profiled wrap every op of their execution plan so its time is recorded in a histogram keyed
+    by the op's path in the signal graph, e.g. ("voices", "LowPassFilter[lpf]", "Mixer"). Ops only time their own
+    component, since the subcomponents run as ops of their own, so the histograms hold self times and the paths
+    can be written out directly as folded stacks for flame graph tools.
+
+    The synthesizer also records the time of every chunk, which gives the DSP load: the time spent rendering
+    a chunk over the time it takes to play it. Past 100% the output device runs dry.
+
+    Voices rendered on a thread pool are profiled too. Every thread records into histograms of its own, so
+    nothing is shared without a lock, and the snapshot adds them up per path. Ops on other threads overlap the
+    chunk, so the shares in the report are of the CPU time: the chunk time plus the time of the ops that ran
+    on other threads.
+
+    The profiler is updated without a lock. Anything that reads it from another thread, like a report built by
+    the logging thread, should read a snapshot() taken on the audio thread between chunks, when the other threads
+    are done with the chunk.
+    """
+    def __init__(self, sample_rate: int, report_interval: float=10.0):
+        self.log = logging.getLogger(__name__)
+        self.sample_rate = sample_rate
+        self.report_interval = report_interval
+        # The histograms of every thread that recorded an op, by thread ident
+        self._threads = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._chunk_thread = None
+        self.chunks = Histogram()
+        self.peak_load = 0.0
+        self._frames_rendered = 0
+        self._last_report = time.perf_counter()
+
+    def histogram(self, path: tuple) -> Histogram:
+        """
+        The calling thread's histogram for path.
+        """
+        histograms = getattr(self._local, "histograms", None)
+        if histograms is None:
+            histograms = self._local.histograms = {}
+            with self._lock:
+                self._threads[threading.get_ident()] = histograms
+        if (histogram := histograms.get(path)) is None:
+            histogram = histograms[path] = Histogram()
+        return histogram
+
+    @property
+    def histograms(self) -> dict:
+        """
+        The histogram of every path, added up over the threads.
+        """
+        histograms = {}
+        for thread_histograms in list(self._threads.values()):
+            for path, histogram in list(thread_histograms.items()):
+                histograms.setdefault(path, Histogram()).add(histogram)
+        return histograms
+
+    @property
+    def parallel_ns(self) -> int:
+        """
+        The time spent in ops on threads other than the one that renders the chunks.
+        """
+        return sum(histogram.total_ns for thread, histograms in list(self._threads.items()) if thread != self._chunk_thread
+                   for histogram in histograms.values())
+
+    def wrap(self, path: tuple, function):
+        """
+        Return function, timed into the histogram for path of whichever thread runs it.
+        """
+        def timed(*args):
+            start = perf_counter_ns()
+            function(*args)
+            self.histogram(path).record(perf_counter_ns() - start)
+        return timed
+
+    def record_chunk(self, ns: int, frames: int):
+        """
+        Record the time it took to render a chunk of frames.
+        """
+        self._chunk_thread = threading.get_ident()
+        self.chunks.record(ns)
+        self._frames_rendered += frames
+        load = ns * self.sample_rate / (frames * 1e9)
+        if load > self.peak_load:
+            self.peak_load = load
+
+    @property
+    def dsp_load(self) -> float:
+        """
+        The average render time over the duration of the audio rendered, as a percentage.
+        """
+        if self._frames_rendered == 0:
+            return 0.0
+        return 100.0 * self.chunks.total_ns * self.sample_rate / (self._frames_rendered * 1e9)
+
+    def snapshot(self) -> 'Profiler':
+        """
+        A copy of the numbers recorded so far, which later recording doesn't change. It's cheap enough to take
+        on the audio thread: one short list per histogram.
+        """
+        snapshot = Profiler(self.sample_rate, self.report_interval)
+        snapshot._threads = {thread: {path: histogram.copy() for path, histogram in list(histograms.items())}
+                             for thread, histograms in list(self._threads.items())}
+        snapshot._chunk_thread = self._chunk_thread
+        snapshot.chunks = self.chunks.copy()
+        snapshot.peak_load = self.peak_load
+        snapshot._frames_rendered = self._frames_rendered
+        return snapshot
+
+    def report(self, xruns: int=None) -> str:
+        string = f"DSP load: {self.dsp_load:.1f}% average, {100.0 * self.peak_load:.1f}% peak over {self.chunks.count} chunks"
+        if xruns is not None:
+            string += f", {xruns} xruns"
+        string += f"\nChunk: mean {self.chunks.mean_ns / 1e3:.1f}us, p99 <{self.chunks.percentile(0.99) / 1e3:.1f}us, max {self.chunks.max_ns / 1e3:.1f}us"
+        parallel_ns = self.parallel_ns
+        if parallel_ns:
+            string += f"\nOps on other threads: {parallel_ns / 1e6:.1f}ms of CPU time on top of the chunks"
+        total_ns = max(self.chunks.total_ns + parallel_ns, 1)
+        for path, histogram in sorted(self.histograms.items(), key=lambda item: -item[1].total_ns):
+            string += (f"\n{'/'.join(path)}: {100.0 * histogram.total_ns / total_ns:.1f}% of CPU time, {histogram.count} calls,"
+                       f" mean {histogram.mean_ns / 1e3:.1f}us, p99 <{histogram.percentile(0.99) / 1e3:.1f}us, max {histogram.max_ns / 1e3:.1f}us")
+        return string
+
+    def report_due(self) -> bool:
+        """
+        Whether report_interval seconds have passed since the last periodic report.
+        """
+        if self.report_interval <= 0:
+            return False
+        now = time.perf_counter()
+        if now - self._last_report < self.report_interval:
+            return False
+        self._last_report = now
+        return True
+
+    def folded_stacks(self, root: str="synth") -> str:
+        """
+        The recorded times as folded stacks ("root;frame;frame microseconds" per line), the input format of
+        flamegraph.pl, speedscope and inferno. Time spent in a chunk outside any profiled op is the root's own time.
+        Ops that ran on other threads are counted in full, so the stacks add up to the CPU time.
+        """
+        lines = []
+        profiled_ns = 0
+        for path, histogram in self.histograms.items():
+            lines.append(f"{';'.join((root,) + path)} {histogram.total_ns // 1000}")
+            profiled_ns += histogram.total_ns
+        # Ops on the chunk's thread are part of the chunk time, the others ran alongside it
+        chunk_ops_ns = profiled_ns - self.parallel_ns
+        lines.append(f"{root} {max(self.chunks.total_ns - chunk_ops_ns, 0) // 1000}")
+        return "\n".join(lines) + "\n"
+
+    def write_folded_stacks(self, path: str):
+        try:
+            with open(path, "w") as file:
+                file.write(self.folded_stacks())
+            self.log.info(f"Wrote folded stacks to {path}")
+        except OSError as e:
+            self.log.error(f"Couldn't write folded stacks to {path}: {e}")
+
+    def reset(self):
+        for histograms in list(self._threads.values()):
+            for histogram in list(histograms.values()):
+                histogram.reset()
+        self.chunks.reset()
+        self.peak_load = 0.0
+        self._frames_rendered = 0
@@ -0,0 +1,87 @@
+import heapq
+import itertools
+import logging
+import time
+from queue import SimpleQueue, Empty
+
+class FrameClock:
+    """
+    A monotonic clock that counts sample frames since it was created.
+    The MIDI listener stamps events with it and the synthesizer uses it to place them inside a chunk.
+    """
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._start_time = time.perf_counter()
+
+    def now(self) -> int:
+        return int((time.perf_counter() - self._start_time) * self.sample_rate)
+
+
+class EventScheduler:
+    """
+    Holds timestamped events until the chunk they fall in is rendered.
+
+    Events are scheduled from the control thread and popped by the audio thread. They pass through a queue to the
+    audio side, which keeps them in a heap ordered by frame, so neither side takes a lock.
+
+    With a clock, event frames are clock frames. Each block covers the block's worth of clock frames before it starts,
+    so an event is rendered exactly one block after it arrived, at its own offset in the block, instead of at the
+    start of whichever block comes next. A block may be rendered in several chunks, which follow each other without
+    gaps or overlaps. Without a clock, event frames count the frames rendered so far, which is what offline
+    rendering wants.
+    """
+    def __init__(self, clock: FrameClock=None):
+        self.log = logging.getLogger(__name__)
+        self.clock = clock
+        self._inbox = SimpleQueue()
+        self._events = []
+        self._sequence = itertools.count()
+        # The frame the next chunk starts at. With a clock it is set by the first block
+        self._next_start = None if clock is not None else 0
+
+    def schedule(self, frame: int, function, *args):
+        """
+        Call function(*args) on the audio thread when the render reaches frame.
+        Events at the same frame run in the order they were scheduled.
+        """
+        self._inbox.put((frame, next(self._sequence), function, args))
+
+    def begin_block(self, frames: int):
+        """
+        Line up the block of frames frames about to be rendered with the clock, if there is one.
+        """
+        if self.clock is None:
+            return
+        # Carry on from the end of the last block so callback jitter doesn't move events around,
+        # but follow the clock again if we drift by more than a block (at startup or after an underrun)
+        clock_start = self.clock.now() - frames
+        if self._next_start is None or abs(self._next_start - clock_start) > frames:
+            self._next_start = clock_start
+
+    def begin_chunk(self, frames: int) -> int:
+        """
+        Collect newly scheduled events and return the frame the chunk about to be rendered starts at.
+        Each chunk starts where the one before it ended.
+        """
+        while True:
+            try:
+                heapq.heappush(self._events, self._inbox.get_nowait())
+            except Empty:
+                break
+
+        if self._next_start is None:
+            self._next_start = self.clock.now() - frames
+        chunk_start = self._next_start
+        self._next_start += frames
+        return chunk_start
+
+    def pop_due(self, end_frame: int):
+        """
+        Yield (frame, function, args) for every event before end_frame, in order.
+        """
+        while self._events and self._events[0][0] < end_frame:
+            frame, _, function, args = heapq.heappop(self._events)
+            yield frame, function, args
+
+    def __len__(self):
+        return len(self._events) + self._inbox.qsize()
@@ -0,0 +1,21 @@
+import numpy as np
+
+from .component import Component
+
+class BusInput(Component):
+    """
+    A leaf component that returns whatever chunk was last fed to it.
+    It lets a signal computed outside of a component tree, like the sum of all voices, be the source of a chain.
+    """
+    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="BusInput"):
+        super().__init__(sample_rate, frames_per_chunk, [], name=name)
+        self._chunk = np.zeros(self.frames_per_chunk, np.float32)
+
+    def render_into(self, out):
+        np.copyto(out, self._chunk[..., :out.shape[-1]])
+
+    def __deepcopy__(self, memo):
+        return BusInput(self.sample_rate, self.frames_per_chunk, name=self.name)
+
+    def feed(self, chunk):
+        self._chunk = chunk
@@ -5,19 +5,96 @@ import numpy as np
 
 from .component import Component
 from .oscillator import Oscillator
+from .envelope import Envelope
+from .compiler import compile_plan
+from .parameter_registry import ParameterRegistry
 
 class Chain():
+    """
+    A signal chain is a tree of components with a single root.
+    It renders by running an ExecutionPlan compiled from the tree, which is recompiled only when the graph changes.
+    The parameters registry indexes the tagged parameters of the tree. It is built when the chain is created or copied
+    and rebuilt when the plan is recompiled for a changed tree. Registries that copied its setters with extend, like
+    the synthesizer's, keep the old ones.
+    """
     def __init__(self, root_component: Component):
         self.log = logging.getLogger(__name__)
         self._root_component = root_component
+        self._plan = None
+        self._graph = None
+        self.parameters = ParameterRegistry()
+        self.parameters.register(self._root_component)
+        self._stateful_components = None
+        self._tail_levels = None
+        self._envelopes = None
+        self._profiler = None
+        self._profile_path = ()
 
     def __iter__(self):
         self.root_iter = iter(self._root_component)
+        self._output = np.zeros(self._root_component.output_shape(self._root_component.frames_per_chunk), np.float32)
+        self._plan = None
         return self
     
     def __next__(self):
-        chunk = next(self.root_iter)
-        return chunk
+        self.render_into(self._output)
+        return self._output
+
+    def render_into(self, out):
+        """
+        Render the next chunk of the chain in place into out
+        """
+        if self._plan is None or self._plan.graph_version != Component.graph_version:
+            self.compile()
+        self._plan.run(out)
+
+    def compile(self):
+        """
+        Compile the plan, unless only the graph of some other chain has changed since the plan was compiled.
+        """
+        graph_version = Component.graph_version
+        graph = self.graph()
+        if self._plan is not None and graph == self._graph:
+            self._plan.graph_version = graph_version
+            return
+        if self._graph is not None and graph != self._graph:
+            self.parameters.rebuild(self._root_component)
+            self._stateful_components = None
+            self._tail_levels = None
+            self._envelopes = None
+        self._graph = graph
+        self._plan = compile_plan(self._root_component, self._root_component.frames_per_chunk, self._profiler, self._profile_path)
+
+    def graph(self):
+        """
+        The shape of the tree: every component with its subcomponents, by id.
+        """
+        graph = []
+        visited = set()
+
+        def visit(component):
+            if id(component) in visited:
+                return
+            visited.add(id(component))
+            graph.append((id(component), tuple(id(subcomponent) for subcomponent in component.subcomponents)))
+            for subcomponent in component.subcomponents:
+                visit(subcomponent)
+
+        visit(self._root_component)
+        return graph
+
+    def profile(self, profiler, path: tuple=()):
+        """
+        Time every component of the chain with profiler, under path. Pass None to stop profiling.
+        """
+        self._profiler = profiler
+        self._profile_path = tuple(path)
+        self._plan = None
+
+    @property
+    def plan(self):
+        """The compiled execution plan, or None if the chain hasn't rendered yet"""
+        return self._plan
     
     def __deepcopy__(self, memo):
         return Chain(deepcopy(self._root_component, memo))
@@ -35,6 +112,38 @@ class Chain():
         """
         return self._root_component.active
     
+    def tail_level(self):
+        """
+        The highest tail level of any component in the chain. See Component.tail_level
+        For a block of voices the levels are in a buffer that is overwritten on the next call.
+        """
+        if self._stateful_components is None:
+            self._stateful_components = [component for component in self.get_components_by_class(Component)
+                                         if type(component).tail_level is not Component.tail_level]
+        if self._tail_levels is None:
+            shape = np.broadcast_shapes(*(np.shape(component.tail_level()) for component in self._stateful_components))
+            self._tail_levels = np.zeros(shape)
+        levels = self._tail_levels
+        levels.fill(0.0)
+        for component in self._stateful_components:
+            np.maximum(levels, component.tail_level(), out=levels)
+        return levels if levels.ndim else float(levels)
+
+    @property
+    def finished(self):
+        """
+        Whether every envelope in the chain has finished its release, one flag per voice for a block of voices.
+        It is None when the chain has no envelope, so its release can only be told from its level.
+        """
+        if self._envelopes is None:
+            self._envelopes = self.get_components_by_class(Envelope)
+        if len(self._envelopes) == 0:
+            return None
+        finished = True
+        for envelope in self._envelopes:
+            finished = np.logical_and(finished, envelope.finished)
+        return finished
+
     def get_components_by_class(self, cls):
         components = []
 
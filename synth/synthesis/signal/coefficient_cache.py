@@ -0,0 +1,69 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from scipy.signal import butter
+
+class CoefficientCache:
+    """
+    A bounded cache of Butterworth low-pass coefficients shared by every filter instance.
+
+    Entries are keyed by (order, normalized cutoff), where the normalized cutoff is the cutoff divided by the
+    Nyquist frequency, so filters running at different sample rates share entries when they can.
+    When the cache is full the least recently used entry is evicted. The cached arrays are read-only because
+    they are shared between filters.
+    """
+    def __init__(self, max_size: int=512):
+        self.log = logging.getLogger(__name__)
+        self.max_size = max_size
+        self._coefficients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._coefficients)
+
+    def get(self, order: int, cutoff_frequency: float, sample_rate: int):
+        """
+        Returns the (b, a) coefficients for the filter, designing it on a cache miss.
+        Raises ValueError if the cutoff is not between 0 and the Nyquist frequency.
+        """
+        key = (int(order), self.normalize(cutoff_frequency, sample_rate))
+        with self._lock:
+            if (coefficients := self._coefficients.get(key)) is not None:
+                self._coefficients.move_to_end(key)
+                return coefficients
+
+        coefficients = self.design(*key)
+        with self._lock:
+            self._coefficients[key] = coefficients
+            while len(self._coefficients) > self.max_size:
+                self._coefficients.popitem(last=False)
+        return coefficients
+
+    def prefill(self, order: int, cutoff_frequencies, sample_rate: int):
+        """
+        Design and cache the coefficients for every cutoff in cutoff_frequencies, e.g. a whole CC lookup table.
+        Cutoffs that are out of range are skipped.
+        """
+        for cutoff_frequency in cutoff_frequencies:
+            if 0.0 < self.normalize(cutoff_frequency, sample_rate) < 1.0:
+                self.get(order, cutoff_frequency, sample_rate)
+            else:
+                self.log.debug(f"Skipping out of range cutoff {cutoff_frequency}Hz at sample rate {sample_rate}")
+
+    def clear(self):
+        with self._lock:
+            self._coefficients.clear()
+
+    @staticmethod
+    def normalize(cutoff_frequency: float, sample_rate: int) -> float:
+        """The cutoff as a fraction of the Nyquist frequency"""
+        nyquist = 0.5 * int(sample_rate)
+        return float(cutoff_frequency) / nyquist
+
+    @staticmethod
+    def design(order: int, normalized_cutoff: float):
+        b, a = butter(order, normalized_cutoff, btype='low', analog=False)
+        b.flags.writeable = False
+        a.flags.writeable = False
+        return b, a
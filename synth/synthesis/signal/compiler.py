@@ -0,0 +1,174 @@
+import logging
+from collections import Counter
+from typing import List
+
+import numpy as np
+
+from .component import Component
+
+class ExecutionPlan:
+    """
+    A signal graph flattened into a list of ops in topological order.
+
+    Each op renders one component into a scratch buffer. Buffers are assigned by liveness when the plan is compiled:
+    once every consumer of a buffer has run, the buffer is handed to the next component that needs one of the same shape.
+    The last op renders the root component straight into the caller's buffer.
+    Each op is (function, inputs, output). Leaf components have no inputs and are called as render_into(output),
+    the rest as process(inputs, output).
+    """
+    def __init__(self, ops: List[tuple], root_op: tuple, buffers: List[np.ndarray], graph_version: int, frames_per_chunk: int):
+        self.ops = ops
+        self.root_op = root_op
+        self.buffers = buffers
+        self.graph_version = graph_version
+        self.frames_per_chunk = frames_per_chunk
+        self._partial_ops = {}
+
+    def run(self, out: np.ndarray):
+        """
+        Render the whole graph into out. out may be shorter than frames_per_chunk to render part of a chunk.
+        """
+        if out.shape[-1] != self.frames_per_chunk:
+            self.run_partial(out)
+            return
+        for function, inputs, output in self.ops:
+            if inputs is None:
+                function(output)
+            else:
+                function(inputs, output)
+        function, inputs, _ = self.root_op
+        if inputs is None:
+            function(out)
+        else:
+            function(inputs, out)
+
+    def run_partial(self, out: np.ndarray):
+        """
+        Render fewer frames than frames_per_chunk by running every op on the leading part of its buffers.
+        """
+        ops, root_inputs = self.partial_ops(out.shape[-1])
+        for function, inputs, output in ops:
+            if inputs is None:
+                function(output)
+            else:
+                function(inputs, output)
+        function = self.root_op[0]
+        if root_inputs is None:
+            function(out)
+        else:
+            function(root_inputs, out)
+
+    def partial_ops(self, frames: int):
+        """
+        The ops and root inputs with every buffer cut to its first frames frames.
+        The views are made the first time a frame count is rendered and kept. There are at most frames_per_chunk
+        frame counts, so once the block sizes in use have all been seen, partial blocks allocate nothing.
+        """
+        if (partial := self._partial_ops.get(frames)) is None:
+            ops = [(function, None if inputs is None else [buffer[..., :frames] for buffer in inputs], output[..., :frames])
+                   for function, inputs, output in self.ops]
+            root_inputs = self.root_op[1]
+            if root_inputs is not None:
+                root_inputs = [buffer[..., :frames] for buffer in root_inputs]
+            partial = self._partial_ops[frames] = (ops, root_inputs)
+        return partial
+
+    def __len__(self):
+        return len(self.ops) + 1
+
+    def __str__(self):
+        return f"ExecutionPlan: {len(self)} ops, {len(self.buffers)} scratch buffers"
+
+
+def profile_label(component: Component) -> str:
+    """
+    The name of a component in profiles. Components of the same class are told apart by control tag,
+    but not by their random name suffix, so the same node of every voice adds up.
+    """
+    if component.control_tag:
+        return f"{type(component).__name__}[{component.control_tag}]"
+    return type(component).__name__
+
+
+def set_up(root_component: Component):
+    """
+    Set up with iter() every component under root_component that hasn't been set up since it was attached or since
+    its subcomponents were replaced. iter() sets up the whole subtree of a component.
+    """
+    visited = set()
+
+    def visit(component):
+        if id(component) in visited:
+            return
+        visited.add(id(component))
+        if getattr(component, "_set_up_subcomponents", None) is not component.subcomponents:
+            iter(component)
+            return
+        for subcomponent in component.subcomponents:
+            visit(subcomponent)
+
+    visit(root_component)
+
+
+def compile_plan(root_component: Component, frames_per_chunk: int, profiler=None, profile_path: tuple=()) -> ExecutionPlan:
+    """
+    Compile the tree (or DAG) under root_component into an ExecutionPlan.
+    A component reachable through more than one path is rendered once and its output is shared.
+    Components attached since the tree was set up with iter() are set up first.
+    With a profiler, every op is timed under its path in the graph, starting from profile_path.
+    """
+    log = logging.getLogger(__name__)
+    graph_version = Component.graph_version
+    set_up(root_component)
+
+    # Post-order traversal gives a topological order: every component comes after its inputs
+    order = []
+    visited = set()
+    consumers = Counter()
+    paths = {}
+
+    def visit(component, path):
+        if id(component) in visited:
+            return
+        visited.add(id(component))
+        paths[id(component)] = path
+        for subcomponent in component.subcomponents:
+            consumers[id(subcomponent)] += 1
+            visit(subcomponent, path + (profile_label(subcomponent),))
+        order.append(component)
+
+    visit(root_component, tuple(profile_path) + (profile_label(root_component),))
+
+    buffers = []
+    free_buffers = {}
+    output_buffers = {}
+    ops = []
+    for component in order:
+        inputs = [output_buffers[id(subcomponent)] for subcomponent in component.subcomponents]
+        is_leaf = len(component.subcomponents) == 0
+        function = component.render_into if is_leaf else component.process
+        if profiler is not None:
+            function = profiler.wrap(paths[id(component)], function)
+
+        if component is root_component:
+            root_op = (function, None, None) if is_leaf else (function, inputs, None)
+        else:
+            # Take the output buffer before releasing the inputs, so a component never writes over its own input
+            shape = tuple(component.output_shape(frames_per_chunk))
+            if free_buffers.get(shape):
+                output = free_buffers[shape].pop()
+            else:
+                output = np.zeros(shape, np.float32)
+                buffers.append(output)
+            output_buffers[id(component)] = output
+            ops.append((function, None, output) if is_leaf else (function, inputs, output))
+
+        for subcomponent in component.subcomponents:
+            consumers[id(subcomponent)] -= 1
+            if consumers[id(subcomponent)] == 0:
+                buffer = output_buffers[id(subcomponent)]
+                free_buffers.setdefault(buffer.shape, []).append(buffer)
+
+    plan = ExecutionPlan(ops, root_op, buffers, graph_version, frames_per_chunk)
+    log.debug("Compiled %s: %s", root_component.name, plan)
+    return plan
@@ -2,6 +2,8 @@ import logging
 from typing import List
 import random
 
+import numpy as np
+
 class Component():
     """
     Represents a base signal component. A signal component is an iterator.
@@ -10,11 +12,26 @@ class Component():
 
     A component can have a list of subcomponents, which should also be iterators.
 
+    Rendering happens in place: render_into(out) renders every subcomponent into a preallocated input buffer
+    and then calls process(inputs, out) to write the result into out. __next__ is a wrapper around render_into
+    that renders into a buffer owned by the component, so in steady state nothing is allocated per chunk.
+    The buffers are allocated by __iter__.
+
     A component must implement
-    __iter__
-    __next__
+    process (or render_into, for generators)
     __deepcopy__
+
+    Parameter changes from the control side go through prepare and apply, so anything expensive about a change
+    happens before it reaches the audio side.
+
+    Chains compile their tree into an ExecutionPlan. graph_version counts every change to the subcomponents of an
+    existing component, so a chain knows when to check whether its plan is stale. Building a component doesn't count.
+    Assign a new list to subcomponents to change the graph rather than mutating the list in place.
     """
+    graph_version = 0
+
+    # The names of the properties that can be set through a ParameterRegistry by control tag
+    parameters = ()
 
     def __init__(self, sample_rate: int, frames_per_chunk: int, subcomponents: List['Component']=[], name="Component", control_tag: str = ""):
         self.log = logging.getLogger(__name__)
@@ -26,16 +43,89 @@ class Component():
         self.control_tag = control_tag
 
     def __iter__(self):
+        for subcomponent in self.subcomponents:
+            iter(subcomponent)
+        self._inputs = [np.zeros(subcomponent.output_shape(self.frames_per_chunk), np.float32) for subcomponent in self.subcomponents]
+        self._output = np.zeros(self.output_shape(self.frames_per_chunk), np.float32)
+        # The subcomponents the buffers were set up for, so a compiled plan can tell when to set the component up again
+        self._set_up_subcomponents = self.subcomponents
         return self
     
     def __next__(self):
-        self.log.error("Child class should override the __next__ method")
+        """
+        Returns the next chunk. The returned array is owned by the component and is overwritten on the next call.
+        """
+        self.render_into(self._output)
+        return self._output
+
+    def render_into(self, out):
+        """
+        Render the next out.shape[-1] frames into out.
+        """
+        frames = out.shape[-1]
+        inputs = self._inputs
+        if frames != self.frames_per_chunk:
+            inputs = [buffer[..., :frames] for buffer in inputs]
+        for subcomponent, buffer in zip(self.subcomponents, inputs):
+            subcomponent.render_into(buffer)
+        self.process(inputs, out)
+
+    def process(self, inputs: List[np.ndarray], out: np.ndarray):
+        """
+        Compute the output from the already rendered subcomponent outputs and write it into out.
+        inputs has one array per subcomponent, in the same order.
+        """
+        self.log.error("Child class should override the process method")
         raise NotImplementedError
+
+    def prepare(self, parameter: str, value):
+        """
+        Resolve a new value for one of the parameters into the state the component needs to use it, e.g. filter
+        coefficients. It is called on the control side, so it may be slow, but it must not change the component.
+        Raises ValueError if the value is invalid. By default the value itself is the state.
+        """
+        return value
+
+    def apply(self, parameter: str, prepared):
+        """
+        Switch to state returned by prepare. It is called on the audio side, so it should only assign.
+        """
+        setattr(self, parameter, prepared)
+
+    def tail_level(self):
+        """
+        The level of the signal still held in the component's state, like a filter's memory.
+        It is used to decide when a released voice has gone silent. Stateless components have no tail.
+        Components that render blocks of voices may return one level per voice.
+        """
+        return 0.0
+
+    def output_shape(self, frames: int):
+        """
+        The shape of the array the component renders for the given number of frames.
+        Components pass the shape of their first input through, so components downstream of a block of voices
+        render blocks too. Leaf components render a single chunk.
+        """
+        if len(self.subcomponents) > 0:
+            return self.subcomponents[0].output_shape(frames)
+        return (frames,)
     
     def __deepcopy__(self, memo):
         self.log.error("invoked deepcopy on base class")
         raise NotImplementedError
     
+    @property
+    def subcomponents(self):
+        """The components whose outputs are the inputs of this component"""
+        return self._subcomponents
+
+    @subcomponents.setter
+    def subcomponents(self, value):
+        changed = hasattr(self, "_subcomponents")
+        self._subcomponents = value
+        if changed:
+            Component.graph_version += 1
+
     @property
     def sample_rate(self):
         """The number of sample slices per second"""
@@ -6,38 +6,65 @@ import numpy as np
 from .component import Component
 
 class Delay(Component):
+    """
+    A feedback delay. The output is the input plus the output from delay_time seconds ago, scaled by wet_gain.
+
+    The delay buffer is a circular buffer holding the last delay_buffer_length seconds of output.
+    Every chunk is written at the write index, which then advances, so nothing in the buffer has to move.
+    """
+    parameters = ("delay_time", "wet_gain")
+
     def __init__(self, sample_rate, frames_per_chunk, subcomponents, name="Delay", control_tag="delay") -> None:
         super().__init__(sample_rate, frames_per_chunk, subcomponents=subcomponents, name=name, control_tag=control_tag)
         self.log = logging.getLogger(__name__)
         self.delay_buffer_length = 4.0
-        self._delay_time = 0.0
         self.delay_frames = int(self.delay_buffer_length * self.sample_rate)
         self.delay_buffer = np.zeros(self.delay_frames, np.float32)
-        self.delay_time_start_index = self.delay_frames - int(self.delay_time * self.sample_rate)
+        self.write_index = 0
+        self.delay_time = 0.0
         self.wet_gain = 0.5 
 
     def __iter__(self):
-        self.signal_iter = iter(self.subcomponents[0])
+        super().__iter__()
+        self._delayed_signal = np.zeros(self.frames_per_chunk, np.float32)
         return self
     
-    def __next__(self):
-        mix = next(self.signal_iter)
+    def process(self, inputs, out):
+        mix = inputs[0]
         
         # Add the delayed signal to the mix
         if self.delay_time > 0:
-            delayed_signal = self.delay_buffer[self.delay_time_start_index: self.delay_time_start_index + self.frames_per_chunk]
-            while len(delayed_signal) < self.frames_per_chunk:
-                delayed_signal = np.concatenate((delayed_signal, self.delay_buffer[:self.frames_per_chunk - len(delayed_signal)]))
-            
+            delayed_signal = self._delayed_signal[:out.shape[-1]]
+            read_index = (self.write_index - self.delay_time_frames) % self.delay_frames
+            self.read_buffer(read_index, delayed_signal)
             delayed_signal *= self.wet_gain
-            mix += delayed_signal
+            np.add(mix, delayed_signal, out=out)
+        else:
+            np.copyto(out, mix)
 
         # Add the current signal to the delay buffer
-        self.delay_buffer = np.roll(self.delay_buffer, -self.frames_per_chunk)
-        self.delay_buffer[self.delay_frames - self.frames_per_chunk: self.delay_frames] = mix
+        self.write_buffer(out)
 
-        return mix
+    def read_buffer(self, start_index: int, out: np.ndarray):
+        """
+        Copy len(out) frames out of the circular buffer starting at start_index, wrapping around the end if needed.
+        """
+        frames = len(out)
+        first_part = min(frames, self.delay_frames - start_index)
+        out[:first_part] = self.delay_buffer[start_index:start_index + first_part]
+        if first_part < frames:
+            out[first_part:] = self.delay_buffer[:frames - first_part]
 
+    def write_buffer(self, chunk: np.ndarray):
+        """
+        Copy the chunk into the circular buffer at the write index and advance the write index past it.
+        """
+        frames = len(chunk)
+        first_part = min(frames, self.delay_frames - self.write_index)
+        self.delay_buffer[self.write_index:self.write_index + first_part] = chunk[:first_part]
+        if first_part < frames:
+            self.delay_buffer[:frames - first_part] = chunk[first_part:]
+        self.write_index = (self.write_index + frames) % self.delay_frames
     
     def __deepcopy__(self, memo):
         return Delay(self.sample_rate, self.frames_per_chunk, subcomponents=[deepcopy(sub, memo) for sub in self.subcomponents], name=self.name, control_tag=self.control_tag)
@@ -48,5 +75,9 @@ class Delay(Component):
 
     @delay_time.setter
     def delay_time(self, value):
-        self._delay_time = float(value)
-        self.delay_time_start_index = self.delay_frames - int(self.delay_time * self.sample_rate)
+        float_val = float(value)
+        if float_val > self.delay_buffer_length:
+            self.log.error(f"Delay time {float_val}s is longer than the {self.delay_buffer_length}s buffer, clamping it")
+            float_val = self.delay_buffer_length
+        self._delay_time = float_val
+        self.delay_time_frames = int(self.delay_time * self.sample_rate)
@@ -0,0 +1,345 @@
+import logging
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from typing import List
+
+import numpy as np
+
+from .component import Component
+
+class EnvelopeTables:
+    """
+    A bounded cache of envelope gain tables shared by every envelope instance.
+
+    A table holds every gain an envelope can output, one entry per frame, laid out as
+    [attack][decay][sustain][release][0]. The attack rises from 0 towards 1, the decay falls from 1 to the sustain
+    level, the sustain is a single entry and the release falls from 1 to 0. The segments are exponential curves,
+    like the charging and discharging of the capacitor in an analog envelope.
+    Entries are keyed by the segment lengths in frames and the sustain level, so every voice with the same settings
+    shares one read-only table. When the cache is full the least recently used table is evicted.
+    """
+    # How far past its end point each curve aims. Small ratios give steep exponential curves, large ones almost lines
+    attack_ratio = 0.3
+    decay_release_ratio = 1e-4
+
+    def __init__(self, max_size: int=16):
+        self.log = logging.getLogger(__name__)
+        self.max_size = max_size
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tables)
+
+    def get(self, attack_frames: int, decay_frames: int, sustain: float, release_frames: int):
+        """
+        Returns the gain table for the envelope, building it on a cache miss.
+        """
+        key = (int(attack_frames), int(decay_frames), float(sustain), int(release_frames))
+        with self._lock:
+            if (table := self._tables.get(key)) is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        table = self.build(*key)
+        with self._lock:
+            self._tables[key] = table
+            while len(self._tables) > self.max_size:
+                self._tables.popitem(last=False)
+        return table
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+    @staticmethod
+    def curve(frames: int, ratio: float):
+        """
+        An exponential curve that rises from 0 and reaches 1 after frames frames. The end point itself is excluded.
+        """
+        k = np.log((1.0 + ratio) / ratio)
+        x = np.arange(frames, dtype=np.float64) / frames
+        return -np.expm1(-k * x) / -np.expm1(-k)
+
+    @classmethod
+    def build(cls, attack_frames: int, decay_frames: int, sustain: float, release_frames: int):
+        table = np.concatenate((
+            cls.curve(attack_frames, cls.attack_ratio),
+            1.0 - (1.0 - sustain) * cls.curve(decay_frames, cls.decay_release_ratio),
+            (sustain,),
+            1.0 - cls.curve(release_frames, cls.decay_release_ratio),
+            (0.0,),
+        )).astype(np.float32)
+        table.flags.writeable = False
+        return table
+
+
+class Envelope(Component):
+    """
+    An ADSR envelope that shapes the amplitude of its input.
+
+    The gains come from a precomputed table (see EnvelopeTables). Every voice keeps its position in the table and
+    the position it holds at: the sustain entry while the note is held, the final 0 once it's released. Rendering a
+    chunk reads the next gains out of the table, so it costs one multiply per sample. A held voice in its sustain
+    is multiplied by a constant.
+
+    A change of attack, decay, sustain or release is prepared into a new table on the control side
+    (see Component.prepare). Applying it only swaps the table in and moves every voice to the same gain in it.
+
+    The envelope works on a single chunk or on a (num_voices, frames) block, with one position per voice.
+    A note on or note off starts the attack or the release from the voice's current gain, by seeking the table for
+    that gain, so retriggering or releasing early doesn't click.
+    Setting active starts or releases every voice. Releasing doesn't deactivate the subcomponents, so the sound
+    keeps going through the release. They are deactivated once the release of a single voice is over.
+    finished tells when a released voice has reached 0.
+    """
+    tables = EnvelopeTables()
+    parameters = ("attack", "decay", "sustain", "release")
+
+    def __init__(self, sample_rate: int, frames_per_chunk: int, subcomponents: List['Component'] = [], name: str="Envelope", control_tag: str="env"):
+        # The active setter moves the voices, so they are set up before the base class sets active
+        self._positions = None
+        self._block = False
+        super().__init__(sample_rate, frames_per_chunk, subcomponents, name, control_tag)
+        self.log = logging.getLogger(__name__)
+        # The settings the control side has prepared, which the applied settings catch up with
+        self._pending = {"attack": 0.005, "decay": 0.2, "sustain": 0.8, "release": 0.3}
+        self.switch_table(*self.prepare_table())
+        self.reset(1)
+
+    def __iter__(self):
+        super().__iter__()
+        shape = self.output_shape(self.frames_per_chunk)
+        self._block = len(shape) == 2
+        num_voices = shape[0] if self._block else 1
+        if len(self._positions) != num_voices:
+            self.reset(num_voices)
+        self._ramp = np.arange(self.frames_per_chunk, dtype=np.intp)
+        self._indices = np.empty((num_voices, self.frames_per_chunk), dtype=np.intp)
+        self._gains = np.empty((num_voices, self.frames_per_chunk), dtype=np.float32)
+        self._levels = np.empty((num_voices, 1), dtype=np.float32)
+        self._tail_levels = np.empty(num_voices)
+        return self
+
+    def reset(self, num_voices: int):
+        """
+        Set up num_voices finished voices.
+        """
+        self._positions = np.full(num_voices, self._end, dtype=np.intp)
+        self._holds = np.full(num_voices, self._end, dtype=np.intp)
+
+    def process(self, inputs, out):
+        input_signal = inputs[0]
+        frames = out.shape[-1]
+        positions = self._positions
+        holds = self._holds
+
+        if np.array_equal(positions, holds):
+            # Every voice is holding its sustain, or is finished
+            if input_signal.ndim == 2:
+                # Positions are always inside the table. np.take buffers out unless it may clip
+                np.take(self._table, positions, out=self._levels[:, 0], mode="clip")
+                np.multiply(input_signal, self._levels, out=out)
+            else:
+                np.multiply(input_signal, self._table[positions[0]], out=out)
+            return
+
+        if input_signal.ndim == 1 and positions[0] + frames <= holds[0]:
+            # The whole chunk is inside one run of the table
+            gains = self._table[positions[0]:positions[0] + frames]
+        else:
+            indices = self._indices[:, :frames]
+            np.add(positions[:, np.newaxis], self._ramp[:frames], out=indices)
+            np.minimum(indices, holds[:, np.newaxis], out=indices)
+            gains = self._gains[:, :frames]
+            np.take(self._table, indices, out=gains, mode="clip")
+            if input_signal.ndim == 1:
+                gains = gains[0]
+        np.multiply(input_signal, gains, out=out)
+        positions += frames
+        np.minimum(positions, holds, out=positions)
+        if not self._block and positions[0] >= self._end:
+            # The release is over, so the sources can stop and the state between them and the envelope can settle
+            for sub in self.subcomponents:
+                sub.active = False
+
+    def note_on(self, voice: int=None):
+        """
+        Start the attack of a voice, or of every voice, from its current gain.
+        """
+        voices = slice(None) if voice is None else voice
+        self._positions[voices] = self.seek_attack(self._table[self._positions[voices]])
+        self._holds[voices] = self._sustain_index
+
+    def note_off(self, voice: int=None):
+        """
+        Start the release of a voice, or of every voice, from its current gain.
+        """
+        voices = slice(None) if voice is None else voice
+        self._positions[voices] = self.seek_release(self._table[self._positions[voices]])
+        self._holds[voices] = self._end
+
+    @property
+    def finished(self):
+        """
+        Whether the release has ended, so the envelope only outputs zeros until the next note on.
+        For a block of voices there is one flag per voice.
+        """
+        finished = self._positions >= self._end
+        return finished if self._block else bool(finished[0])
+
+    def tail_level(self):
+        """
+        The current gain. For a block of voices there is one level per voice, in a buffer that is overwritten on
+        the next call.
+        """
+        if not self._block:
+            return float(self._table[self._positions[0]])
+        # Tail levels are float64 like a filter's, so a chain can take their maximum without casting
+        np.take(self._table, self._positions, out=self._levels[:, 0], mode="clip")
+        np.copyto(self._tail_levels, self._levels[:, 0])
+        return self._tail_levels
+
+    def prepare(self, parameter: str, value):
+        """
+        A setting is prepared into the table for the pending settings, so building it never happens on the audio side.
+        """
+        if parameter not in self.parameters:
+            return super().prepare(parameter, value)
+        float_val = float(value)
+        if parameter == "sustain" and (float_val > 1.0 or float_val < 0.0):
+            raise ValueError("The sustain level must be between 0.0 and 1.0")
+        if float_val < 0.0:
+            raise ValueError(f"The {parameter} time can't be negative")
+        self._pending[parameter] = float_val
+        return self.prepare_table()
+
+    def apply(self, parameter: str, prepared):
+        if parameter not in self.parameters:
+            return super().apply(parameter, prepared)
+        self.switch_table(*prepared)
+
+    def prepare_table(self):
+        """
+        Returns the pending settings and their table.
+        """
+        settings = dict(self._pending)
+        table = self.tables.get(self.seconds_to_frames(settings["attack"]), self.seconds_to_frames(settings["decay"]),
+                                settings["sustain"], self.seconds_to_frames(settings["release"]))
+        return settings, table
+
+    def switch_table(self, settings: dict, table: np.ndarray):
+        """
+        Switch to a prepared table and move every voice to the same gain in it.
+        """
+        levels = self._table[self._positions] if self._positions is not None else None
+        if levels is not None:
+            released = self._holds == self._end
+            in_decay = ~released & (self._positions >= self._decay_index)
+
+        self._attack, self._decay, self._sustain, self._release = (settings[parameter] for parameter in self.parameters)
+        self._table = table
+        self._decay_index = self.seconds_to_frames(self._attack)
+        self._sustain_index = self._decay_index + self.seconds_to_frames(self._decay)
+        self._release_index = self._sustain_index + 1
+        self._end = len(self._table) - 1
+
+        if levels is not None:
+            self._positions = np.where(released, self.seek_release(levels),
+                                       np.where(in_decay, self.seek_decay(levels), self.seek_attack(levels)))
+            self._holds = np.where(released, self._end, self._sustain_index)
+
+    def seek_attack(self, levels):
+        """The positions in the attack where the gain reaches levels. Levels above the attack land on the decay"""
+        return np.searchsorted(self._table[:self._decay_index], levels)
+
+    def seek_decay(self, levels):
+        """The positions in the decay where the gain falls to levels. Levels below the sustain land on the sustain"""
+        positions = self._decay_index + np.searchsorted(-self._table[self._decay_index:self._release_index], -levels)
+        return np.minimum(positions, self._sustain_index)
+
+    def seek_release(self, levels):
+        """The positions in the release where the gain falls to levels"""
+        return self._release_index + np.searchsorted(-self._table[self._release_index:], -levels)
+
+    def seconds_to_frames(self, seconds: float) -> int:
+        # Every segment is at least one frame long, so a gain never jumps within a sample
+        return max(1, int(round(seconds * self.sample_rate)))
+
+    def __deepcopy__(self, memo):
+        envelope = Envelope(self.sample_rate, self.frames_per_chunk, [deepcopy(self.subcomponents[0], memo)], name=self.name, control_tag=self.control_tag)
+        envelope.attack = self.attack
+        envelope.decay = self.decay
+        envelope.sustain = self.sustain
+        envelope.release = self.release
+        return envelope
+
+    @property
+    def active(self):
+        """
+        Whether a note is held. Setting it starts the attack or the release of every voice.
+        Only activating is passed on to the subcomponents, so they keep sounding through the release.
+        """
+        return self._active
+
+    @active.setter
+    def active(self, value):
+        try:
+            bool_val = bool(value)
+            self._active = bool_val
+            if self._positions is None:
+                return
+            if bool_val:
+                for sub in self.subcomponents:
+                    sub.active = True
+                self.note_on()
+            else:
+                self.note_off()
+        except ValueError:
+            self.log.error(f"Unable to set with value {value}")
+
+    @property
+    def attack(self):
+        """The attack time in seconds"""
+        return self._attack
+
+    @attack.setter
+    def attack(self, value):
+        self.set_parameter("attack", value)
+
+    @property
+    def decay(self):
+        """The decay time in seconds"""
+        return self._decay
+
+    @decay.setter
+    def decay(self, value):
+        self.set_parameter("decay", value)
+
+    @property
+    def sustain(self):
+        """The sustain level from 0.0 to 1.0"""
+        return self._sustain
+
+    @sustain.setter
+    def sustain(self, value):
+        self.set_parameter("sustain", value)
+
+    @property
+    def release(self):
+        """The release time in seconds"""
+        return self._release
+
+    @release.setter
+    def release(self, value):
+        self.set_parameter("release", value)
+
+    def set_parameter(self, parameter: str, value):
+        """
+        Prepare and apply a setting right away.
+        """
+        try:
+            self.apply(parameter, self.prepare(parameter, value))
+        except ValueError as e:
+            self.log.error(f"Couldn't set {parameter} with value {value}: {e}")
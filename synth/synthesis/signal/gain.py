@@ -10,19 +10,16 @@ class Gain(Component):
     """
     The gain component multiplies the amplitude of the signal by a constant factor.
     """
+    parameters = ("amp",)
+
     def __init__(self, sample_rate: int, frames_per_chunk: int, subcomponents: List['Component'] = [], name: str="Gain", control_tag: str="gain"):
         super().__init__(sample_rate, frames_per_chunk, subcomponents, name, control_tag)
         self.log = logging.getLogger(__name__)
         self.amp = 1.0
         self.control_tag = control_tag
 
-    def __iter__(self):
-        self.subcomponent_iter = iter(self.subcomponents[0]) # Gain should only have 1 subcomponent
-        return self
-    
-    def __next__(self):
-        chunk = next(self.subcomponent_iter)
-        return chunk * self.amp
+    def process(self, inputs, out):
+        np.multiply(inputs[0], self.amp, out=out) # Gain should only have 1 subcomponent
     
     def __deepcopy__(self, memo):
         return Gain(self.sample_rate, self.frames_per_chunk, subcomponents=[deepcopy(self.subcomponents[0], memo)], name=self.name, control_tag=self.control_tag)
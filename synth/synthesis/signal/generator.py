@@ -9,4 +9,11 @@ class Generator(Component):
         Generators should be leaf nodes on the signal tree. That means they have no subcomponents.
         """
         super().__init__(sample_rate, frames_per_chunk, [], name=name)
-        self.log = logging.getLogger(__name__)
\ No newline at end of file
+        self.log = logging.getLogger(__name__)
+
+    def render_into(self, out):
+        """
+        Generators have no inputs, so they write their signal directly into out.
+        """
+        self.log.error("Child class should override the render_into method")
+        raise NotImplementedError
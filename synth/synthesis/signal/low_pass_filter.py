@@ -3,27 +3,50 @@ from typing import List
 from copy import deepcopy
 
 import numpy as np
-from scipy.signal import butter, lfilter, lfilter_zi
+from scipy.signal import lfilter
 
 from .component import Component
+from .coefficient_cache import CoefficientCache
 
 class LowPassFilter(Component):
+    """
+    A Butterworth low-pass filter.
+    Coefficients come from a cache shared by all instances, so changing the cutoff is usually a dictionary lookup.
+    """
+    coefficient_cache = CoefficientCache()
+    parameters = ("cutoff_frequency",)
+
     def __init__(self, sample_rate: int, frames_per_chunk: int, subcomponents: List['Component'] = [], name: str="LowPassFilter", control_tag: str="lpf"):
         super().__init__(sample_rate, frames_per_chunk, subcomponents=subcomponents, name=name, control_tag=control_tag)
         self.log = logging.getLogger(__name__)
         self.filter_order = 2
         self.cutoff_frequency = 20000.0
-        self.b, self.a = self.compute_coefficients()
+        self.coefficients = self.compute_coefficients()
         self.zi = self.compute_initial_conditions()
 
-    def __iter__(self):
-        self.source_iter = iter(self.subcomponents[0])
-        return self
+    def process(self, inputs, out):
+        input_signal = inputs[0]
+        if input_signal.ndim == 2 and self.zi.ndim == 1:
+            # A block of voices is filtered along the frame axis, so every voice needs its own filter state
+            self.zi = np.tile(self.zi, (input_signal.shape[0], 1))
+            self._tail_scratch = np.empty_like(self.zi)
+            self._tail_levels = np.empty(input_signal.shape[0])
+        # lfilter always allocates its result, so this is the one copy left on the render path
+        # b and a are kept in one tuple, so a cutoff change can never be seen half applied
+        b, a = self.coefficients
+        output_signal, self.zi = lfilter(b, a, input_signal, zi=self.zi)
+        np.copyto(out, output_signal)
 
-    def __next__(self):
-        input_signal = next(self.source_iter)
-        output_signal, self.zi = lfilter(self.b, self.a, input_signal, zi=self.zi)
-        return output_signal.astype(np.float32)
+    def tail_level(self):
+        """
+        The peak of the filter state. For a block of voices there is one level per voice, in a buffer that is
+        overwritten on the next call.
+        """
+        zi = self.zi
+        if zi.ndim == 1:
+            return float(max(zi.max(), -zi.min()))
+        np.abs(zi, out=self._tail_scratch)
+        return np.max(self._tail_scratch, axis=-1, out=self._tail_levels)
 
     def __deepcopy__(self, memo):
         return LowPassFilter(self.sample_rate, self.frames_per_chunk, [deepcopy(self.subcomponents[0], memo)], name=self.name, control_tag=self.control_tag)
@@ -35,20 +58,30 @@ class LowPassFilter(Component):
     @cutoff_frequency.setter
     def cutoff_frequency(self, value):
         try:
-            float_val = float(value)
-            if float_val < 0.0:
-                raise ValueError("Cutoff frequency must be positive.")
-            self._cutoff_frequency = float_val
-            self.b, self.a = self.compute_coefficients()
+            self.apply("cutoff_frequency", self.prepare("cutoff_frequency", value))
         except ValueError:
             self.log.error(f"Couldn't set with value {value}")
 
+    def prepare(self, parameter: str, value):
+        """
+        A cutoff is prepared into the cutoff and its coefficients, so a cache miss designs the filter on the control side.
+        """
+        if parameter != "cutoff_frequency":
+            return super().prepare(parameter, value)
+        float_val = float(value)
+        if float_val < 0.0:
+            raise ValueError("Cutoff frequency must be positive.")
+        return float_val, self.coefficient_cache.get(self.filter_order, float_val, self.sample_rate)
+
+    def apply(self, parameter: str, prepared):
+        if parameter != "cutoff_frequency":
+            return super().apply(parameter, prepared)
+        self._cutoff_frequency, self.coefficients = prepared
+
     def compute_coefficients(self):
-        nyquist = 0.5 * self.sample_rate
-        normalized_cutoff = self.cutoff_frequency / nyquist
-        b, a = butter(self.filter_order, normalized_cutoff, btype='low', analog=False)
-        return b, a
+        return self.coefficient_cache.get(self.filter_order, self.cutoff_frequency, self.sample_rate)
 
     def compute_initial_conditions(self):
-        zi = lfilter_zi(self.b, self.a)
-        return zi
+        # The filter starts at rest. lfilter_zi would be the steady state for a constant input of 1,
+        # so a fresh voice's first note would start with a DC step
+        return np.zeros(max(len(b) for b in self.coefficients) - 1)
@@ -1,5 +1,4 @@
 import logging
-from copy import deepcopy
 
 import numpy as np
 
@@ -15,12 +14,13 @@ class NoiseGenerator(Generator):
         self.rng = np.random.default_rng()
         return super().__iter__()
     
-    def __next__(self):
+    def render_into(self, out):
         if self.active:
-            noise = self.amp * self.rng.uniform(-1.0, 1.0, self.frames_per_chunk)
-            return noise.astype(np.float32)
+            self.rng.random(out=out, dtype=np.float32)
+            out *= 2.0 * self.amp
+            out -= self.amp
         else:
-            return np.zeros(self.frames_per_chunk, dtype=np.float32)
+            out.fill(0.0)
     
     def __deepcopy__(self, memo):
         return NoiseGenerator(self.sample_rate, self.frames_per_chunk)
\ No newline at end of file
@@ -2,17 +2,83 @@ import logging
 import numpy as np
 
 from .generator import Generator
+from .wavetable import get_wavetable
 
 class Oscillator(Generator):
     """
     The base class for any component that generates a signal with frequency.
+
+    Oscillators share a phase accumulator. Rather than evaluating the waveform over absolute time,
+    each oscillator keeps its phase in cycles wrapped to [0, 1) and advances it by frequency / sample_rate
+    every frame. This keeps precision constant no matter how long the voice runs, and keeps the waveform
+    continuous when the frequency changes mid-note.
+    Child classes implement generate_waveform to turn a chunk of phases into samples.
+
+    When band_limited is set, the waveform is read from the shared band-limited wavetable for waveform_shape
+    instead of being computed by generate_waveform.
     """
-    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="Oscillator"):
+    waveform_shape = None
+
+    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="Oscillator", band_limited: bool=False):
         super().__init__(sample_rate, frames_per_chunk, name=name)
         self.log = logging.getLogger(__name__)
         self.frequency = 0.0
         self.phase = 0.0
         self.amplitude = 0.1
+        self.band_limited = band_limited
+        self._phase_accumulator = 0.0
+
+    def __iter__(self):
+        # Precompute the per-frame ramp and allocate the buffers we will reuse for every chunk
+        super().__iter__()
+        self._ramp = np.arange(self.frames_per_chunk, dtype=np.float64)
+        self._phases = np.empty(self.frames_per_chunk, dtype=np.float64)
+        self._phase_accumulator = 0.0
+        self._wavetable = None
+        if self.band_limited:
+            self._wavetable = get_wavetable(self.waveform_shape, self.sample_rate)
+            self._indices = np.empty(self.frames_per_chunk, dtype=np.intp)
+            self._scratch = np.empty(self.frames_per_chunk, dtype=np.float32)
+        return self
+
+    def render_into(self, out):
+        """
+        Write the next chunk of the waveform into out.
+        """
+        frames = out.shape[-1]
+        if self.frequency <= 0.0:
+            if self.frequency < 0.0:
+                self.log.error("Overriding negative frequency to 0")
+            out.fill(0.0)
+            return
+
+        phases = self.advance_phase(frames)
+        if self._wavetable is not None:
+            self._wavetable.lookup(phases, self.frequency, out, self._indices[:frames], self._scratch[:frames])
+            out *= self.amplitude
+        else:
+            self.generate_waveform(phases, out)
+
+    def advance_phase(self, frames: int):
+        """
+        Fill the phase buffer for the next frames and advance the phase accumulator.
+        Phases are in cycles and wrapped to [0, 1). The phase offset is applied here so child classes don't have to.
+        """
+        increment = self.frequency / self.sample_rate
+        phases = self._phases[:frames]
+        np.multiply(self._ramp[:frames], increment, out=phases)
+        phases += self._phase_accumulator + self.phase / (2 * np.pi)
+        np.mod(phases, 1.0, out=phases)
+        self._phase_accumulator = (self._phase_accumulator + increment * frames) % 1.0
+        return phases
+
+    def generate_waveform(self, phases: np.ndarray, out: np.ndarray):
+        """
+        Write one chunk of the waveform into out.
+        phases is a float64 scratch array of phases in cycles [0, 1). It may be modified in place.
+        """
+        self.log.error("Child class should override the generate_waveform method")
+        raise NotImplementedError
 
     @property
     def frequency(self):
@@ -27,6 +93,19 @@ class Oscillator(Generator):
         except:
             self.log.error(f"unable to set with value {value}")
 
+    @property
+    def band_limited(self):
+        """Whether the oscillator reads its waveform from a band-limited wavetable"""
+        return self._band_limited
+
+    @band_limited.setter
+    def band_limited(self, value):
+        bool_val = bool(value)
+        if bool_val and self.waveform_shape is None:
+            self.log.error(f"{self.name} has no wavetable shape, it can't be band limited")
+            bool_val = False
+        self._band_limited = bool_val
+
     @property
     def phase(self):
         """The phase offset of the wave in radians"""
@@ -81,4 +160,4 @@ class Oscillator(Generator):
             self._active = bool_val
             self.frequency = 0.0 if not bool_val else self.frequency
         except ValueError:
-            self.log.error(f"Unable to set with value {value}")
\ No newline at end of file
+            self.log.error(f"Unable to set with value {value}")
@@ -0,0 +1,65 @@
+import logging
+
+import numpy as np
+
+from .generator import Generator
+from .wavetable import Wavetable, get_wavetable
+
+class OscillatorBank(Generator):
+    """
+    Renders one band-limited waveform shape for a whole bank of voices at once.
+    Frequency, phase and amplitude are kept in arrays with one entry per voice, and each chunk is a
+    (num_voices, frames_per_chunk) block produced by a single vectorized wavetable lookup.
+    Components downstream of a bank work on the whole block until a VoiceSum reduces it over the voice axis.
+    """
+    def __init__(self, sample_rate: int, frames_per_chunk: int, num_voices: int, shape: str="sine", name: str="OscillatorBank"):
+        super().__init__(sample_rate, frames_per_chunk, name=name)
+        self.log = logging.getLogger(__name__)
+        if shape not in Wavetable.shapes:
+            raise ValueError(f"Unknown wavetable shape {shape}. Expected one of {Wavetable.shapes}")
+        self.shape = shape
+        self.num_voices = num_voices
+        self.frequencies = np.zeros(self.num_voices, dtype=np.float64)
+        self.amplitudes = np.full(self.num_voices, 0.1, dtype=np.float64)
+        self.phase_accumulators = np.zeros(self.num_voices, dtype=np.float64)
+
+    def __iter__(self):
+        super().__iter__()
+        self._wavetable = get_wavetable(self.shape, self.sample_rate)
+        block_shape = self.output_shape(self.frames_per_chunk)
+        self._ramp = np.arange(self.frames_per_chunk, dtype=np.float64)
+        self._phases = np.empty(block_shape, dtype=np.float64)
+        self._indices = np.empty(block_shape, dtype=np.intp)
+        self._scratch = np.empty(block_shape, dtype=np.float32)
+        self._levels = np.empty((self.num_voices, 1), dtype=np.float32)
+        self.phase_accumulators.fill(0.0)
+        return self
+
+    def render_into(self, out):
+        """
+        Write the next (num_voices, frames) block into out. Voices with a frequency of 0 are silent.
+        """
+        frames = out.shape[-1]
+        phases = self._phases[:, :frames]
+        increments = self.frequencies / self.sample_rate
+        np.multiply(self._ramp[:frames], increments[:, np.newaxis], out=phases)
+        phases += self.phase_accumulators[:, np.newaxis]
+        np.mod(phases, 1.0, out=phases)
+        self.phase_accumulators += increments * frames
+        np.mod(self.phase_accumulators, 1.0, out=self.phase_accumulators)
+
+        self._wavetable.lookup(phases, self.frequencies, out, self._indices[:, :frames], self._scratch[:, :frames])
+        np.multiply(self.amplitudes, self.frequencies > 0.0, out=self._levels[:, 0])
+        out *= self._levels
+
+    def output_shape(self, frames: int):
+        return (self.num_voices, frames)
+
+    def __deepcopy__(self, memo):
+        return OscillatorBank(self.sample_rate, self.frames_per_chunk, self.num_voices, shape=self.shape, name=self.name)
+
+    def note_on(self, voice: int, frequency: float):
+        self.frequencies[voice] = frequency
+
+    def note_off(self, voice: int):
+        self.frequencies[voice] = 0.0
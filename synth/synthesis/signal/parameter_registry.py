@@ -0,0 +1,111 @@
+import logging
+from collections import defaultdict
+from functools import partial
+
+from .component import Component
+
+class ParameterSetter:
+    """
+    Sets one parameter of one component.
+    Calling it sets the value right away. prepare does the expensive part of a change, like designing a filter,
+    on the calling thread and returns a function that applies the result, so the audio side only has to assign it.
+    See Component.prepare and Component.apply.
+    """
+    __slots__ = ("component", "parameter")
+
+    def __init__(self, component: Component, parameter: str):
+        self.component = component
+        self.parameter = parameter
+
+    def __call__(self, value):
+        setattr(self.component, self.parameter, value)
+
+    def prepare(self, value):
+        """
+        Returns a function of no arguments that applies value, or None if the component rejects it.
+        """
+        try:
+            prepared = self.component.prepare(self.parameter, value)
+        except ValueError as e:
+            self.component.log.error(f"Couldn't set {self.parameter} with value {value}: {e}")
+            return None
+        return partial(self.component.apply, self.parameter, prepared)
+
+
+def prepare_setter(setter, value):
+    """
+    Prepare a registered setter, see ParameterSetter.prepare. Setters added with add_setter that have no prepare
+    method of their own have nothing to prepare, so calling them is the whole change.
+    """
+    if (prepare := getattr(setter, "prepare", None)) is not None:
+        return prepare(value)
+    return partial(setter, value)
+
+
+class ParameterRegistry:
+    """
+    An index from (control tag, parameter name) to the setters of every matching component parameter.
+
+    Components list the parameters that can be controlled in their parameters class attribute.
+    The registry walks a tree once when it is registered, so setting a parameter is a dictionary lookup followed
+    by a bulk call of the bound setters, instead of a search of every tree.
+    """
+    def __init__(self):
+        self.log = logging.getLogger(__name__)
+        self._setters = defaultdict(list)
+
+    def register(self, root_component: Component):
+        """
+        Register every tagged parameter in the tree under root_component.
+        """
+        visited = set()
+
+        def register_component(component):
+            if id(component) in visited:
+                return
+            visited.add(id(component))
+            if component.control_tag:
+                for parameter in component.parameters:
+                    self._setters[(component.control_tag, parameter)].append(ParameterSetter(component, parameter))
+            for subcomponent in component.subcomponents:
+                register_component(subcomponent)
+
+        register_component(root_component)
+
+    def rebuild(self, root_component: Component):
+        """
+        Replace every setter with the ones of the tree under root_component, after the tree changed.
+        The new index is swapped in with one assignment, so a reader on another thread sees the old or the new one.
+        """
+        registry = ParameterRegistry()
+        registry.register(root_component)
+        self._setters = registry._setters
+
+    def extend(self, other: 'ParameterRegistry'):
+        """
+        Add every setter of another registry to this one.
+        """
+        for key, setters in other._setters.items():
+            self._setters[key].extend(setters)
+
+    def add_setter(self, control_tag: str, parameter: str, setter):
+        """
+        Register a setter that isn't a component property, e.g. one that forwards the value somewhere else.
+        """
+        self._setters[(control_tag, parameter)].append(setter)
+
+    def get_setters(self, control_tag: str, parameter: str):
+        """
+        Returns the list of setters for the parameter. The list is empty if nothing is registered under the key.
+        """
+        return self._setters.get((control_tag, parameter), [])
+
+    def set(self, control_tag: str, parameter: str, value):
+        for setter in self.get_setters(control_tag, parameter):
+            setter(value)
+
+    def keys(self):
+        return self._setters.keys()
+
+    def __contains__(self, key):
+        return key in self._setters
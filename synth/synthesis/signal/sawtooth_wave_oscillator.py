@@ -5,34 +5,21 @@ import numpy as np
 from .oscillator import Oscillator
 
 class SawtoothWaveOscillator(Oscillator):
-    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="SawtoothWaveOscillator"):
-        super().__init__(sample_rate, frames_per_chunk, name=name)
-        self.log = logging.getLogger(__name__)
-
-    def __iter__(self):
-        self._chunk_duration = self.frames_per_chunk / self.sample_rate
-        self._chunk_start_time = 0.0
-        self._chunk_end_time = self._chunk_duration
-        return self
-    
-    def __next__(self):
-        # Generate the sample
-        if self.frequency <= 0.0:
-            if self.frequency < 0.0:
-                self.log.error("Overriding negative frequency to 0")
-            sample = np.zeros(self.frames_per_chunk)
-        
-        else:
-            # calculate the period
-            period = 1.0 / self.frequency
-            ts = np.linspace(self._chunk_start_time, self._chunk_end_time, self.frames_per_chunk, endpoint=False)
-            sample = self.amplitude * (2 * (ts / period - np.floor(0.5 + ts / period)))
+    waveform_shape = "saw"
 
-        # Update the state variables for next time
-        self._chunk_start_time = self._chunk_end_time
-        self._chunk_end_time += self._chunk_duration
+    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="SawtoothWaveOscillator", band_limited: bool=False):
+        super().__init__(sample_rate, frames_per_chunk, name=name, band_limited=band_limited)
+        self.log = logging.getLogger(__name__)
 
-        return sample.astype(np.float32)
+    def generate_waveform(self, phases, out):
+        """
+        The wave starts at 0, rises to the peak at half a cycle, then jumps to the trough and rises back to 0.
+        Shifting the phase by half a cycle lets us write that as a single wrapped ramp.
+        """
+        phases += 0.5
+        np.mod(phases, 1.0, out=phases)
+        np.multiply(phases, 2 * self.amplitude, out=out)
+        out -= self.amplitude
     
     def __deepcopy__(self, memo):
-        return SawtoothWaveOscillator(self.sample_rate, self.frames_per_chunk, name="SawtoothWaveOscillator")
+        return SawtoothWaveOscillator(self.sample_rate, self.frames_per_chunk, name="SawtoothWaveOscillator", band_limited=self.band_limited)
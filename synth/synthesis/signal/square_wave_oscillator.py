@@ -2,22 +2,22 @@ import logging
 
 import numpy as np
 
-from .sine_wave_oscillator import SineWaveOscillator
+from .oscillator import Oscillator
 
-class SquareWaveOscillator(SineWaveOscillator):
-    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="SquareWaveOscillator"):
-        super().__init__(sample_rate, frames_per_chunk, name=name)
+class SquareWaveOscillator(Oscillator):
+    waveform_shape = "square"
+
+    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="SquareWaveOscillator", band_limited: bool=False):
+        super().__init__(sample_rate, frames_per_chunk, name=name, band_limited=band_limited)
         self.log = logging.getLogger(__name__)
 
-    def __next__(self):
+    def generate_waveform(self, phases, out):
         """
-        This oscillator works by first generating a sine wave, then setting every frame
-        to either -1 or 1, depending on the sign of the wave y value at that point.
-        This has the effect of filtering it into a square wave
+        The wave is high for the first half of the cycle and low for the second half.
         """
-        sine_wave = super().__next__()
-        square_wave = self.amplitude * np.sign(sine_wave)
-        return square_wave
+        np.greater_equal(phases, 0.5, out=phases)
+        np.multiply(phases, -2 * self.amplitude, out=out)
+        out += self.amplitude
     
     def __deepcopy__(self, memo):
-        return SquareWaveOscillator(self.sample_rate, self.frames_per_chunk, name="SquareWaveOscillator")
\ No newline at end of file
+        return SquareWaveOscillator(self.sample_rate, self.frames_per_chunk, name="SquareWaveOscillator", band_limited=self.band_limited)
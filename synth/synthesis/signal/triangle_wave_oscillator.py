@@ -2,20 +2,23 @@ import logging
 
 import numpy as np
 
-from .sawtooth_wave_oscillator import SawtoothWaveOscillator
+from .oscillator import Oscillator
 
-class TriangleWaveOscillator(SawtoothWaveOscillator):
-    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="TriWaveOscillator"):
-        super().__init__(sample_rate, frames_per_chunk, name=name)
+class TriangleWaveOscillator(Oscillator):
+    waveform_shape = "triangle"
+
+    def __init__(self, sample_rate: int, frames_per_chunk: int, name: str="TriWaveOscillator", band_limited: bool=False):
+        super().__init__(sample_rate, frames_per_chunk, name=name, band_limited=band_limited)
         self.log = logging.getLogger(__name__)
-    
-    def __iter__(self):
-        return super().__iter__()
 
-    def __next__(self):
-        sawtooth = super().__next__()
-        triangle = (abs(sawtooth) - 0.5) * 2
-        return triangle.astype(np.float32)
+    def generate_waveform(self, phases, out):
+        """
+        The wave starts at the trough, peaks at half a cycle and falls back to the trough.
+        """
+        phases -= 0.5
+        np.abs(phases, out=phases)
+        np.multiply(phases, -4 * self.amplitude, out=out)
+        out += self.amplitude
 
     def __deepcopy__(self, memo):
-        return TriangleWaveOscillator(self.sample_rate, self.frames_per_chunk, name="TriWaveOscillator")
\ No newline at end of file
+        return TriangleWaveOscillator(self.sample_rate, self.frames_per_chunk, name="TriWaveOscillator", band_limited=self.band_limited)
@@ -0,0 +1,34 @@
+from copy import deepcopy
+from typing import List
+
+import numpy as np
+
+from .component import Component
+
+class VoiceSum(Component):
+    """
+    Sums a (num_voices, frames_per_chunk) block of voices into a single chunk.
+    The peak level of every voice in the last block is kept in voice_levels.
+    """
+    def __init__(self, sample_rate: int, frames_per_chunk: int, subcomponents: List[Component] = [], name: str="VoiceSum"):
+        super().__init__(sample_rate, frames_per_chunk, subcomponents, name)
+
+    def __iter__(self):
+        super().__iter__()
+        num_voices = self._inputs[0].shape[0]
+        self.voice_levels = np.zeros(num_voices, np.float32)
+        self._voice_minimums = np.zeros(num_voices, np.float32)
+        return self
+
+    def process(self, inputs, out):
+        block = inputs[0]
+        np.sum(block, axis=0, out=out)
+        np.max(block, axis=1, out=self.voice_levels)
+        np.min(block, axis=1, out=self._voice_minimums)
+        np.maximum(self.voice_levels, np.negative(self._voice_minimums, out=self._voice_minimums), out=self.voice_levels)
+
+    def output_shape(self, frames: int):
+        return (frames,)
+
+    def __deepcopy__(self, memo):
+        return VoiceSum(self.sample_rate, self.frames_per_chunk, [deepcopy(self.subcomponents[0], memo)], self.name)
@@ -0,0 +1,106 @@
+import logging
+import math
+
+import numpy as np
+
+class Wavetable:
+    """
+    A set of band-limited single cycle tables for one waveform shape.
+
+    There is one table per octave. The table for octave k only contains the harmonics that stay below
+    the Nyquist frequency for fundamentals up to lowest_frequency * 2^k, so high notes don't alias.
+    Tables are built once per (shape, sample rate) and shared by every oscillator. Use get_wavetable() to get one.
+    """
+    shapes = ("sine", "saw", "square", "triangle")
+    table_size = 2048
+    lowest_frequency = 20.0
+
+    def __init__(self, shape: str, sample_rate: int):
+        self.log = logging.getLogger(__name__)
+        if shape not in self.shapes:
+            raise ValueError(f"Unknown wavetable shape {shape}. Expected one of {self.shapes}")
+        self.shape = shape
+        self.sample_rate = int(sample_rate)
+        nyquist = 0.5 * self.sample_rate
+        self.num_octaves = max(1, math.ceil(math.log2(nyquist / self.lowest_frequency)) + 1)
+
+        # Each table has a guard point so that interpolation never has to wrap the index.
+        # deltas[k] holds table[k + 1] - table[k] so interpolation is a single multiply-add per frame.
+        self.tables = np.zeros((self.num_octaves, self.table_size + 1), dtype=np.float32)
+        self.deltas = np.zeros((self.num_octaves, self.table_size + 1), dtype=np.float32)
+        for octave in range(self.num_octaves):
+            top_frequency = self.lowest_frequency * 2 ** octave
+            max_harmonic = max(1, min(int(nyquist / top_frequency), self.table_size // 2 - 1))
+            table = self.build_table(max_harmonic)
+            self.tables[octave, :self.table_size] = table
+            self.tables[octave, self.table_size] = table[0]
+            self.deltas[octave, :self.table_size] = np.diff(self.tables[octave])
+
+    def build_table(self, max_harmonic: int) -> np.ndarray:
+        """
+        Build one cycle of the shape from its Fourier series, truncated at max_harmonic.
+        The shapes match the naive oscillators: every shape starts its cycle at phase 0 the same way.
+        """
+        harmonics = np.arange(1, max_harmonic + 1)
+        spectrum = np.zeros(self.table_size // 2 + 1, dtype=np.complex128)
+        half_size = self.table_size / 2
+        match self.shape:
+            case "sine":
+                spectrum[1] = -1j * half_size
+            case "saw":
+                signs = np.where(harmonics % 2 == 1, 1.0, -1.0)
+                spectrum[harmonics] = -1j * half_size * (2 / np.pi) * signs / harmonics
+            case "square":
+                odd = harmonics[harmonics % 2 == 1]
+                spectrum[odd] = -1j * half_size * (4 / np.pi) / odd
+            case "triangle":
+                odd = harmonics[harmonics % 2 == 1]
+                spectrum[odd] = -half_size * (8 / np.pi ** 2) / odd ** 2
+        return np.fft.irfft(spectrum, self.table_size)
+
+    def octave_for(self, frequency):
+        """
+        The index of the table to use for a fundamental frequency. Works on scalars and arrays.
+        """
+        ratio = np.maximum(np.asarray(frequency, dtype=np.float64), self.lowest_frequency) / self.lowest_frequency
+        octave = np.minimum(np.ceil(np.log2(ratio)), self.num_octaves - 1).astype(np.intp)
+        return octave if octave.ndim else int(octave)
+
+    def lookup(self, phases: np.ndarray, frequency: float, out: np.ndarray, indices: np.ndarray, scratch: np.ndarray):
+        """
+        Linearly interpolate the table for frequency at the given phases and write the result into out.
+        phases are in cycles [0, 1) and are overwritten.
+        indices (intp) and scratch (float32) are scratch arrays of the same size, so the lookup doesn't allocate.
+
+        frequency may also be an array with one frequency per row of a 2-D phases block. Each row is then read
+        from its own octave's table, still in a single vectorized lookup.
+        """
+        octave = self.octave_for(frequency)
+        phases *= self.table_size
+        np.copyto(indices, phases, casting="unsafe")
+        # Every operand of an arithmetic ufunc has the same type, since mixing types makes numpy allocate a cast buffer
+        np.mod(phases, 1.0, out=phases)
+        if np.ndim(octave):
+            # Offset every row into its own table so one take() over the flattened tables covers the whole block
+            indices += (octave * (self.table_size + 1))[:, np.newaxis]
+            tables, deltas = self.tables.ravel(), self.deltas.ravel()
+        else:
+            tables, deltas = self.tables[octave], self.deltas[octave]
+        np.copyto(scratch, phases, casting="unsafe")
+        deltas.take(indices, out=out, mode="clip")
+        scratch *= out
+        tables.take(indices, out=out, mode="clip")
+        out += scratch
+
+
+_wavetables = {}
+
+def get_wavetable(shape: str, sample_rate: int) -> Wavetable:
+    """
+    Returns the shared wavetable for the shape and sample rate, building it the first time it is requested.
+    """
+    key = (shape, int(sample_rate))
+    if (wavetable := _wavetables.get(key)) is None:
+        wavetable = Wavetable(shape, sample_rate)
+        _wavetables[key] = wavetable
+    return wavetable
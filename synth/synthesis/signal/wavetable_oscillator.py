@@ -0,0 +1,19 @@
+import logging
+
+from .oscillator import Oscillator
+from .wavetable import Wavetable
+
+class WavetableOscillator(Oscillator):
+    """
+    An oscillator that plays one of the band-limited wavetable shapes: sine, saw, square or triangle.
+    Every chunk is a vectorized table lookup with linear interpolation, so there is no transcendental math per frame.
+    """
+    def __init__(self, sample_rate: int, frames_per_chunk: int, shape: str="sine", name: str="WavetableOscillator"):
+        if shape not in Wavetable.shapes:
+            raise ValueError(f"Unknown wavetable shape {shape}. Expected one of {Wavetable.shapes}")
+        self.waveform_shape = shape
+        super().__init__(sample_rate, frames_per_chunk, name=name, band_limited=True)
+        self.log = logging.getLogger(__name__)
+
+    def __deepcopy__(self, memo):
+        return WavetableOscillator(self.sample_rate, self.frames_per_chunk, shape=self.waveform_shape, name="WavetableOscillator")
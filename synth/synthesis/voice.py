@@ -1,18 +1,123 @@
+import numpy as np
+
 from .signal.chain import Chain
+from .signal.envelope import Envelope
+from .signal.oscillator_bank import OscillatorBank
+from .signal.voice_sum import VoiceSum
 
 class Voice:
+    """
+    A voice renders its own signal chain.
+
+    A voice is idle when it has been released, the envelopes of its chain have finished and the state of its chain
+    has decayed below silence_threshold. A chain without an envelope is idle once both its output and its state
+    have decayed below silence_threshold.
+    Idle voices are not rendered until their next note on.
+    """
+    silence_threshold = 1e-4
+
     def __init__(self, signal_chain: Chain):
         self.signal_chain = iter(signal_chain)
         self.note_id = None
+        self.level = 0.0
+        self.idle = True
 
     @property
     def active(self):
         return self.signal_chain.active
 
+    def update_level(self, chunk):
+        """
+        Record the peak level of the chunk the voice just rendered.
+        """
+        self.level = max(float(chunk.max()), -float(chunk.min()))
+
+    def update_activity(self, chunk):
+        """
+        Record the level of the chunk the voice just rendered and mark the voice idle once its tail has died out.
+        """
+        self.update_level(chunk)
+        if self.active:
+            return
+        if (finished := self.signal_chain.finished) is not None:
+            # The filters upstream of the envelopes must have settled too, or the next note starts from their state
+            if finished and self.signal_chain.tail_level() < self.silence_threshold:
+                self.idle = True
+        elif self.level < self.silence_threshold and self.signal_chain.tail_level() < self.silence_threshold:
+            self.idle = True
+
     def note_on(self, frequency, id):
         self._active = True
+        self.idle = False
         self.note_id = id
         self.signal_chain.note_on(frequency)
 
     def note_off(self):
-        self.signal_chain.note_off()
\ No newline at end of file
+        self.signal_chain.note_off()
+
+class BankVoice:
+    """
+    A voice that plays through one slot of the oscillator banks in a shared signal chain.
+    Idle tracking works like Voice, but the bank still renders every slot, so the chain is only skipped
+    when every voice is idle. With envelopes in the chain, a note off releases the voice's envelopes and the
+    oscillators keep playing through the release.
+    """
+    silence_threshold = Voice.silence_threshold
+
+    def __init__(self, signal_chain: Chain, index: int):
+        self.signal_chain = signal_chain
+        self.index = index
+        self.note_id = None
+        self.idle = True
+        self._active = False
+        self._banks = signal_chain.get_components_by_class(OscillatorBank)
+        self._voice_sums = signal_chain.get_components_by_class(VoiceSum)
+        self._envelopes = signal_chain.get_components_by_class(Envelope)
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def level(self):
+        """The peak level of the voice's last rendered chunk"""
+        if len(self._voice_sums) == 0:
+            return 0.0
+        return float(self._voice_sums[0].voice_levels[self.index])
+
+    def update_activity(self, tail_levels):
+        """
+        Mark the voice idle once it is released and its slot has died out.
+        tail_levels is the chain's tail level, with one entry per voice.
+        """
+        if self.active:
+            return
+        tail_level = tail_levels[self.index] if np.ndim(tail_levels) else tail_levels
+        if self._envelopes:
+            if all(envelope.finished[self.index] for envelope in self._envelopes):
+                # The release is over, so the slot can stop and the filter state behind the envelopes can settle
+                for bank in self._banks:
+                    bank.note_off(self.index)
+                if tail_level < self.silence_threshold:
+                    self.idle = True
+            return
+        if self.level < self.silence_threshold and tail_level < self.silence_threshold:
+            self.idle = True
+
+    def note_on(self, frequency, id):
+        self._active = True
+        self.idle = False
+        self.note_id = id
+        for bank in self._banks:
+            bank.note_on(self.index, frequency)
+        for envelope in self._envelopes:
+            envelope.note_on(self.index)
+
+    def note_off(self):
+        self._active = False
+        if self._envelopes:
+            for envelope in self._envelopes:
+                envelope.note_off(self.index)
+            return
+        for bank in self._banks:
+            bank.note_off(self.index)
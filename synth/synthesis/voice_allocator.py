@@ -0,0 +1,99 @@
+import logging
+from collections import deque
+from enum import Enum
+from typing import List
+
+class StealingPolicy(Enum):
+    """
+    Decides which voice to take when a note starts and every voice is sounding.
+    OLDEST steals the voice whose note started first.
+    QUIETEST steals the voice with the lowest output level.
+    RETRIGGER steals like OLDEST, but a note that is already sounding on the same channel restarts its own voice
+    instead of taking a second one.
+    """
+    OLDEST = "oldest"
+    QUIETEST = "quietest"
+    RETRIGGER = "retrigger"
+
+
+class VoiceAllocator:
+    """
+    Assigns voices to notes in constant time.
+
+    Notes are identified by the integer key (channel << 7) | note. Sounding notes are kept in a dict from key to voice,
+    in note on order, so the oldest note is the first entry. Free voices are kept in a queue, so the voice that has
+    been free the longest is reused first.
+    """
+    def __init__(self, voices: List, stealing_policy: StealingPolicy | str=StealingPolicy.OLDEST):
+        self.log = logging.getLogger(__name__)
+        self.voices = voices
+        self.stealing_policy = stealing_policy
+        self._free_voices = deque(voices)
+        self._sounding = {}
+
+    @staticmethod
+    def note_key(note: int, channel: int) -> int:
+        """A unique integer for a note on a channel. MIDI notes are 7 bits, so the channel goes above them."""
+        return (channel << 7) | note
+
+    @property
+    def stealing_policy(self):
+        return self._stealing_policy
+
+    @stealing_policy.setter
+    def stealing_policy(self, value):
+        try:
+            self._stealing_policy = StealingPolicy(value)
+        except ValueError:
+            self.log.error(f"Unknown stealing policy {value}, using {StealingPolicy.OLDEST.value}")
+            self._stealing_policy = StealingPolicy.OLDEST
+
+    def note_on(self, note: int, channel: int, frequency: float):
+        """
+        Start the note on a voice and return the voice.
+        """
+        key = self.note_key(note, channel)
+        if (voice := self._sounding.pop(key, None)) is not None:
+            if self.stealing_policy is StealingPolicy.RETRIGGER:
+                voice.note_on(frequency, key)
+                self._sounding[key] = voice
+                return voice
+            # The same note can't be held twice, release the old one before taking a new voice
+            voice.note_off()
+            self._free_voices.append(voice)
+
+        if self._free_voices:
+            voice = self._free_voices.popleft()
+        else:
+            voice = self.steal()
+        voice.note_on(frequency, key)
+        self._sounding[key] = voice
+        return voice
+
+    def note_off(self, note: int, channel: int):
+        """
+        Release the voice playing the note and return it, or None if the note isn't sounding.
+        """
+        key = self.note_key(note, channel)
+        if (voice := self._sounding.pop(key, None)) is None:
+            return None
+        voice.note_off()
+        self._free_voices.append(voice)
+        return voice
+
+    def steal(self):
+        """
+        Take a sounding voice according to the stealing policy and turn its note off.
+        """
+        if self.stealing_policy is StealingPolicy.QUIETEST:
+            key = min(self._sounding, key=lambda k: self._sounding[k].level)
+        else:
+            key = next(iter(self._sounding))
+        voice = self._sounding.pop(key)
+        self.log.debug("Had no unused voices! Stealing the voice playing note key %d", key)
+        voice.note_off()
+        return voice
+
+    @property
+    def num_sounding(self):
+        return len(self._sounding)
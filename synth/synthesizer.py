@@ -1,112 +1,249 @@
 import threading
 import logging
+from time import perf_counter_ns
 from queue import Queue
 from copy import deepcopy
 
 import numpy as np
 
 from . import midi
-from .midi.implementation import Implementation
-from .synthesis.voice import Voice
+from .midi.event import Event, EventType
+from .midi.implementation import default_routes
+from .synthesis.voice import Voice, BankVoice
+from .synthesis.voice_allocator import VoiceAllocator
+from .synthesis.scheduler import EventScheduler, FrameClock
+from .synthesis.parameter_snapshot import ParameterSnapshot
+from .synthesis.process_engine import ProcessVoiceEngine
+from .synthesis.thread_engine import ThreadVoiceEngine
+from .synthesis.profiler import Profiler
+from .logging_setup import Lazy
 from .synthesis.signal.chain import Chain
+from .synthesis.signal.effects_bus import EffectsBus
+from .synthesis.signal.parameter_registry import ParameterRegistry
 from .synthesis.signal.sine_wave_oscillator import SineWaveOscillator
 from .synthesis.signal.square_wave_oscillator import SquareWaveOscillator
 from .synthesis.signal.sawtooth_wave_oscillator import SawtoothWaveOscillator
 from .synthesis.signal.triangle_wave_oscillator import TriangleWaveOscillator
 from .synthesis.signal.noise_generator import NoiseGenerator
+from .synthesis.signal.oscillator_bank import OscillatorBank
+from .synthesis.signal.voice_sum import VoiceSum
 from .synthesis.signal.gain import Gain
 from .synthesis.signal.mixer import Mixer
 from .synthesis.signal.low_pass_filter import LowPassFilter
+from .synthesis.signal.envelope import Envelope
 from .synthesis.signal.delay import Delay
-from .playback.stream_player import StreamPlayer
+from .playback.output_sink import OutputSink
 
 class Synthesizer(threading.Thread):
-    def __init__(self, sample_rate: int, frames_per_chunk: int, mailbox: Queue, num_voices: int=4) -> None:
+    def __init__(self, sample_rate: int, frames_per_chunk: int, mailbox: Queue, num_voices: int=4, use_oscillator_bank: bool=False, cc_routes: dict=None, voice_stealing: str="oldest", clock: FrameClock=None, render_ahead: int=0, num_workers: int=0, render_threads: int=0, thread_block_size: int=0, output_sink=None, profiler: Profiler=None, profile_output: str=None, block_size: int=None) -> None:
+        """
+        frames_per_chunk is the largest block the voices render in one pass. block_size is the number of frames
+        rendered per block, by default frames_per_chunk.
+        output_sink is called with the synth's generator and returns the OutputSink that plays it.
+        By default the generator is played live on the default output device.
+        With a profiler, every chunk and every component of the voice chains and effects bus is timed. The report
+        is logged every profiler.report_interval seconds and on exit, when the folded stacks are also written to
+        profile_output.
+        """
         super().__init__(name="Synthesizer Thread")
         self.log = logging.getLogger(__name__)
         self.sample_rate = sample_rate
         self.frames_per_chunk = frames_per_chunk
+        self.block_size = block_size if block_size is not None else frames_per_chunk
         self.mailbox = mailbox
         self.num_voices = num_voices
+        self.use_oscillator_bank = use_oscillator_bank
         self.should_run = True
+        self.profiler = profiler
+        self.profile_output = profile_output
+
+        # Note and CC events are applied by the audio thread at their frame inside the chunk
+        self.scheduler = EventScheduler(clock)
 
         # Set up the voices
-        signal_chain_prototype = self.setup_signal_chain()
-        self.log.info(f"Signal Chain Prototype:\n{str(signal_chain_prototype)}")
-        self.voices = [Voice(deepcopy(signal_chain_prototype)) for _ in range(self.num_voices)]
+        self.voice_engine = None
+        if self.use_oscillator_bank:
+            # All voices share one chain that renders them together as a (num_voices, frames_per_chunk) block
+            self.bank_chain = iter(self.setup_bank_signal_chain())
+            self.log.info(f"Oscillator Bank Signal Chain:\n{str(self.bank_chain)}")
+            self.voices = [BankVoice(self.bank_chain, i) for i in range(self.num_voices)]
+            self.signal_chains = [self.bank_chain]
+        else:
+            signal_chain_prototype = self.setup_signal_chain()
+            self.log.info(f"Signal Chain Prototype:\n{str(signal_chain_prototype)}")
+            if num_workers > 0:
+                # The voices live in worker processes and are rendered in parallel
+                try:
+                    self.voice_engine = ProcessVoiceEngine(signal_chain_prototype, self.sample_rate, self.frames_per_chunk, self.num_voices, num_workers)
+                except RuntimeError as e:
+                    self.log.error(f"Couldn't start the voice workers, rendering the voices in this process instead: {e}")
+            if self.voice_engine is not None:
+                self.voices = self.voice_engine.voices
+                self.signal_chains = []
+            else:
+                self.voices = [Voice(deepcopy(signal_chain_prototype)) for _ in range(self.num_voices)]
+                self.signal_chains = [voice.signal_chain for voice in self.voices]
+                if render_threads > 0:
+                    # The voices are rendered in groups on a thread pool
+                    self.voice_engine = ThreadVoiceEngine(self.voices, self.frames_per_chunk, render_threads, thread_block_size)
+
+        self.voice_allocator = VoiceAllocator(self.voices, voice_stealing)
+
+        # Set up the effects that run once on the sum of the voices
+        self.effects_bus = self.setup_effects_bus()
+        self.log.info(f"Effects Bus:\n{str(self.effects_bus)}")
+        self.signal_chains.append(self.effects_bus)
 
-        # Set up the stream player
-        self.stream_player = StreamPlayer(self.sample_rate, self.frames_per_chunk, self.generator())
+        # Index the tagged parameters of every chain so CCs don't have to search the trees
+        self.parameters = ParameterRegistry()
+        for signal_chain in self.signal_chains:
+            self.parameters.extend(signal_chain.parameters)
+        if isinstance(self.voice_engine, ProcessVoiceEngine):
+            self.voice_engine.register_parameters(self.parameters)
+
+        # Parameter changes are written by the control side and swapped in by the audio side between blocks
+        voice_parameters = [voice.signal_chain.parameters for voice in self.voices if isinstance(voice, Voice)]
+        self.parameter_snapshot = ParameterSnapshot(self.parameters, voice_parameters)
+
+        # Voices rendered in worker processes aren't profiled, their time counts towards the chunk as a whole
+        if self.profiler is not None:
+            for signal_chain in self.signal_chains:
+                signal_chain.profile(self.profiler, ("effects_bus",) if signal_chain is self.effects_bus else ("voices",))
+
+        # Set up the output sink
+        if output_sink is None:
+            # Imported here so headless hosts without PyAudio can still render offline
+            from .playback.stream_player import StreamPlayer
+            self.output_sink: OutputSink = StreamPlayer(self.sample_rate, self.block_size, self.generator(), render_ahead=render_ahead)
+        else:
+            self.output_sink: OutputSink = output_sink(self.generator())
 
         # Set up the lookup values
         self.osc_mix_vals = np.linspace(0, 1, 128, endpoint=True, dtype=np.float32)
+        self.osc_mix_a_vals = 1 - self.osc_mix_vals
         self.lpf_cutoff_vals = np.logspace(4, 14, 128, endpoint=True, base=2, dtype=np.float32) # 2^14=16384 : that is the highest possible cutoff value
         self.delay_times = 0.5 * np.logspace(0, 2, 128, endpoint=True, base=2, dtype=np.float32) - 0.5 # range is from 0 - 1.5s
         logspaced = np.logspace(0, 1, 128, endpoint=True, dtype=np.float32) # range is from 1-10
         self.delay_wet_gain_vals = (logspaced - 1) / (10 - 1) # range is from 0-1
+        self.envelope_times = 0.001 * np.logspace(0, 12, 128, endpoint=True, base=2, dtype=np.float32) # range is from 1ms - 4.1s
+        self.envelope_sustain_vals = np.linspace(0, 1, 128, endpoint=True, dtype=np.float32)
+
+        # Design the filter for every cutoff a CC can select up front, so knob sweeps don't call butter()
+        LowPassFilter.coefficient_cache.prefill(2, self.lpf_cutoff_vals, self.sample_rate)
+
+        # Resolve the CC routing table to the lookup tables and setters it drives
+        self.cc_routes = cc_routes if cc_routes is not None else default_routes
+        self.cc_table = self.build_cc_table(self.cc_routes)
 
     def run(self):
-        self.stream_player.play()
-        while self.should_run and self.stream_player.is_active():
+        self.output_sink.play()
+        while self.should_run and self.output_sink.is_active():
             # get() is a blocking call
             if message := self.mailbox.get(): 
                 self.message_handler(message)
         return
     
-    def message_handler(self, message: str):
-        """Handles messages from the mailbox."""
+    def message_handler(self, message):
+        """
+        Handles messages from the mailbox: Events from the MIDI listener, lists of them, and text commands.
+        Text note and CC messages (see message_builder) are converted to Events, for scripts and debugging.
+        """
+        if isinstance(message, Event):
+            self.event_handler(message)
+            return
+        if isinstance(message, list):
+            for event in message:
+                self.event_handler(event)
+            return
         match message.split():
             case ["exit"]:
                 self.log.info("Got exit command.")
-                self.stream_player.stop()
+                self.output_sink.stop()
+                if self.voice_engine is not None:
+                    self.voice_engine.close()
+                self.dump_profile()
                 self.should_run = False
-            case ["note_on", "-n", note, "-c", channel]:
-                int_note = int(note)
-                chan = int(channel)
-                note_name = midi.note_names[int_note]
-                self.note_on(int_note, chan)
-                self.log.info(f"Note on {note_name} ({int_note}), chan {chan}")
-            case ["note_off", "-n", note, "-c", channel]:
-                int_note = int(note)
-                chan = int(channel)
-                note_name = midi.note_names[int_note]
-                self.note_off(int_note, chan)
-                self.log.info(f"Note off {note_name} ({int_note}), chan {chan}")
-            case ["control_change", "-c", channel, "-n", cc_num, "-v", control_val]:
-                chan = int(channel)
-                int_cc_num = int(cc_num)
-                int_cc_val = int(control_val)
-                self.control_change_handler(chan, int_cc_num, int_cc_val)
             case _:
-                self.log.info(f"Matched unknown command: {message}")
+                try:
+                    event = Event.from_message(message)
+                except ValueError as e:
+                    self.log.error(f"Couldn't parse message {message}: {e}")
+                    return
+                if event is None:
+                    self.log.info(f"Matched unknown command: {message}")
+                else:
+                    self.event_handler(event)
+
+    def event_handler(self, event: Event):
+        """
+        Schedules a note or CC event to be applied at its frame.
+        Events without a frame time (frame 0) are applied at the start of the next chunk.
+        """
+        match event.type:
+            case EventType.NOTE_ON:
+                self.scheduler.schedule(event.frame, self.note_on, event.data1, event.channel)
+                self.log.info("Note on %s (%d), chan %d", midi.note_names[event.data1], event.data1, event.channel)
+            case EventType.NOTE_OFF:
+                self.scheduler.schedule(event.frame, self.note_off, event.data1, event.channel)
+                self.log.info("Note off %s (%d), chan %d", midi.note_names[event.data1], event.data1, event.channel)
+            case EventType.CONTROL_CHANGE if event.frame > 0 and self.scheduler.clock is None:
+                # Offline, events are queued ahead of the render, so CCs are applied at their exact frame
+                self.log.info("Control Change: channel %d, number %d, value %d", event.channel, event.data1, event.data2)
+                self.scheduler.schedule(event.frame, self.apply_control_change, self.prepare_control_change(event.data1, event.data2))
+            case EventType.CONTROL_CHANGE:
+                # Live, CCs take effect at the start of the next block. Bursts of them coalesce to one change per block
+                self.control_change_handler(event.channel, event.data1, event.data2)
 
     def control_change_handler(self, channel: int, cc_number: int, val: int):
-        self.log.info(f"Control Change: channel {channel}, number {cc_number}, value {val}")
-        if cc_number == Implementation.OSCILLATOR_MIX.value:
-            gain_b_mix_val = self.osc_mix_vals[val]
-            gain_a_mix_val = 1 - gain_b_mix_val
-            self.set_gain_a(gain_a_mix_val)
-            self.set_gain_b(gain_b_mix_val)
-            self.log.info(f"Gain A: {gain_a_mix_val}")
-            self.log.info(f"Gain B: {gain_b_mix_val}")
-        elif cc_number == Implementation.LPF_CUTOFF.value:
-            lpf_cutoff = self.lpf_cutoff_vals[val]
-            self.set_lpf_cutoff(lpf_cutoff)
-            self.log.info(f"LPF Cutoff: {lpf_cutoff}")
-        elif cc_number == Implementation.DELAY_TIME.value:
-            delay_time = self.delay_times[val]
-            self.set_delay_time(delay_time)
-            self.log.info(f"Delay Time: {delay_time}s")
-        elif cc_number == Implementation.DELAY_WET_GAIN.value:
-            delay_wet_gain = self.delay_wet_gain_vals[val]
-            self.set_delay_wet_gain(delay_wet_gain)
-            self.log.info(f"Delay Wet Gain: {delay_wet_gain}")
-        
+        """
+        Resolve a CC on the control side and write the values it sets into the parameter snapshot.
+        """
+        self.log.info("Control Change: channel %d, number %d, value %d", channel, cc_number, val)
+        for route, lookup_values, setters in self.cc_table.get(cc_number, ()):
+            value = lookup_values[val]
+            self.parameter_snapshot.write((None, route.control_tag, route.parameter), setters, value)
+            self.log.debug("%s.%s: %s", route.control_tag, route.parameter, value)
+
+    def prepare_control_change(self, cc_number: int, val: int) -> list:
+        """
+        Resolve a CC on the control side into the functions that apply it, see ParameterSnapshot.prepare.
+        """
+        appliers = []
+        for _, lookup_values, setters in self.cc_table.get(cc_number, ()):
+            appliers.extend(self.parameter_snapshot.prepare(setters, lookup_values[val]))
+        return appliers
+
+    def apply_control_change(self, appliers: list):
+        """
+        Apply a CC prepared by prepare_control_change right away. Only called on the audio side, by the scheduler.
+        """
+        for applier in appliers:
+            applier()
+
+    def build_cc_table(self, cc_routes: dict) -> dict:
+        """
+        Resolve a CC routing table (see midi.implementation.default_routes) into a dict from CC number
+        to a list of (route, lookup table, setters), so handling a CC is a single lookup.
+        """
+        cc_table = {}
+        for cc_number, routes in cc_routes.items():
+            resolved_routes = []
+            for route in routes:
+                lookup_values = getattr(self, route.lookup, None)
+                if lookup_values is None:
+                    self.log.error(f"CC {cc_number} routes to unknown lookup table {route.lookup}")
+                    continue
+                setters = self.parameters.get_setters(route.control_tag, route.parameter)
+                if len(setters) == 0:
+                    self.log.warning(f"CC {cc_number} routes to {route.control_tag}.{route.parameter}, which no component has")
+                resolved_routes.append((route, lookup_values, setters))
+            cc_table[cc_number] = resolved_routes
+        return cc_table
 
     def setup_signal_chain(self) -> Chain:
         """Build the signal chain prototype."""
-        osc_a = SawtoothWaveOscillator(self.sample_rate, self.frames_per_chunk)
-        osc_b = SquareWaveOscillator(self.sample_rate, self.frames_per_chunk)
+        osc_a = SawtoothWaveOscillator(self.sample_rate, self.frames_per_chunk, band_limited=True)
+        osc_b = SquareWaveOscillator(self.sample_rate, self.frames_per_chunk, band_limited=True)
 
         gain_a = Gain(self.sample_rate, self.frames_per_chunk, [osc_a], control_tag="gain_a")
         gain_b = Gain(self.sample_rate, self.frames_per_chunk, [osc_b], control_tag="gain_b")
@@ -115,98 +252,206 @@ class Synthesizer(threading.Thread):
 
         lpf = LowPassFilter(self.sample_rate, self.frames_per_chunk, [mixer], control_tag="lpf")
 
-        delay = Delay(self.sample_rate, self.frames_per_chunk, [lpf], control_tag="delay")
+        envelope = Envelope(self.sample_rate, self.frames_per_chunk, [lpf], control_tag="env")
 
-        signal_chain = Chain(delay)
+        signal_chain = Chain(envelope)
         return signal_chain
+
+    def setup_bank_signal_chain(self) -> Chain:
+        """
+        Build the signal chain used in oscillator bank mode.
+        It is the same patch as setup_signal_chain, but the oscillators, gains, mixer and filter work on
+        all voices at once, and the voices are summed at the end of the chain.
+        """
+        osc_a = OscillatorBank(self.sample_rate, self.frames_per_chunk, self.num_voices, shape="saw")
+        osc_b = OscillatorBank(self.sample_rate, self.frames_per_chunk, self.num_voices, shape="square")
+
+        gain_a = Gain(self.sample_rate, self.frames_per_chunk, [osc_a], control_tag="gain_a")
+        gain_b = Gain(self.sample_rate, self.frames_per_chunk, [osc_b], control_tag="gain_b")
+
+        mixer = Mixer(self.sample_rate, self.frames_per_chunk, [gain_a, gain_b])
+
+        lpf = LowPassFilter(self.sample_rate, self.frames_per_chunk, [mixer], control_tag="lpf")
+
+        envelope = Envelope(self.sample_rate, self.frames_per_chunk, [lpf], control_tag="env")
+
+        voice_sum = VoiceSum(self.sample_rate, self.frames_per_chunk, [envelope])
+
+        signal_chain = Chain(voice_sum)
+        return signal_chain
+
+    def setup_effects_bus(self) -> EffectsBus:
+        """
+        Build the effects bus. The effects are applied in order to the sum of all voices.
+        """
+        delay = Delay(self.sample_rate, self.frames_per_chunk, [], control_tag="delay")
+
+        effects_bus = EffectsBus(self.sample_rate, self.frames_per_chunk, [delay])
+        return effects_bus
     
+    @property
+    def block_size(self):
+        """
+        The number of frames rendered per block when the output sink doesn't ask for a number of frames, which is
+        what the offline sinks do. Live playback opens its stream with block_size frames per buffer, and from then on
+        the device decides how many frames each callback asks for, so changing it only affects offline rendering.
+        frames_per_chunk is the largest block the component buffers hold, so bigger blocks are rendered in several
+        passes.
+        """
+        return self._block_size
+
+    @block_size.setter
+    def block_size(self, value):
+        try:
+            if (int_value := int(value)) > 0:
+                self._block_size = int_value
+            else:
+                raise ValueError
+        except ValueError:
+            self.log.error(f"Couldn't set block_size with value {value}")
+
     def generator(self):
         """
-        Generate the signal by mixing the voice outputs
+        Generate the signal by mixing the voice outputs and running the mix through the effects bus
+        Every buffer is allocated up front and rendered into in place, so the steady state allocates nothing that
+        grows with the block, with one exception: lfilter returns a new output and filter state for every low-pass
+        filter on every block. Small temporaries of the size of the voice count remain too, e.g. in oscillator banks.
+        The yielded array is reused for the next block.
+
+        Starting the generator yields an empty block without rendering anything, so a sink can start it ahead of
+        time and then send it frame counts. After that, next() renders block_size frames and sending a frame count
+        renders that many instead, so a sink can pass on the number of frames its device asked for.
         """
         mix = np.zeros(self.frames_per_chunk, np.float32)
-        num_active_voices = 0
+        voice_output = np.zeros(self.frames_per_chunk, np.float32)
+        output = np.zeros(max(self.frames_per_chunk, self.block_size), np.float32)
+        requested = yield output[:0]
         while True:
-            for i in range(self.num_voices):
-                voice = self.voices[i]
-                mix += next(voice.signal_chain)
-                if voice.active:
-                    num_active_voices += 1
-            
-            # Prevent the mix from going outside the range (-1, 1)
-            mix = np.clip(mix, -1.0, 1.0)
-            
-            yield mix
-            mix = np.zeros(self.frames_per_chunk, np.float32)
-            num_active_voices = 0
+            frames = self.block_size if requested is None else requested
+            if frames > len(output):
+                self.log.info("Growing the output buffer to %d frames", frames)
+                output = np.zeros(frames, np.float32)
+            self.scheduler.begin_block(frames)
+            for start in range(0, frames, self.frames_per_chunk):
+                self.render_block(output[start:min(start + self.frames_per_chunk, frames)], mix, voice_output)
+            requested = yield output[:frames]
+
+    def render_block(self, out, mix, voice_output):
+        """
+        Render a block of up to frames_per_chunk frames into out. mix and voice_output are scratch buffers.
+        Parameter changes written since the last block are swapped in first.
+
+        Scheduled events are applied at their own frame: the voices and the effects bus are rendered up to the
+        event, the event is applied, and rendering continues from there. Events that change the effects take effect
+        at their frame too, so the output doesn't depend on the block size.
+        """
+        if self.profiler is not None:
+            block_start_time = perf_counter_ns()
+        frames = len(out)
+        mix = mix[:frames]
+        self.parameter_snapshot.apply()
+        block_start = self.scheduler.begin_chunk(frames)
+        offset = 0
+        for frame, function, args in self.scheduler.pop_due(block_start + frames):
+            event_offset = min(max(frame - block_start, 0), frames)
+            if event_offset > offset:
+                self.render_segment(out[offset:event_offset], mix[offset:event_offset], voice_output)
+                offset = event_offset
+            function(*args)
+        if offset < frames:
+            self.render_segment(out[offset:], mix[offset:], voice_output)
+
+        if self.profiler is not None:
+            self.profiler.record_chunk(perf_counter_ns() - block_start_time, frames)
+            if self.profiler.report_due():
+                # The report is built by the logging thread from a snapshot, so the audio thread only copies the counts
+                self.log.info("Profile:\n%s", Lazy(self.profiler.snapshot().report, self.output_sink.xruns))
+
+    def render_segment(self, out, mix, voice_output):
+        """
+        Render the voices into mix and run them through the effects bus into out, for part of a block.
+        """
+        self.render_voices(mix, voice_output)
+        bus_output = self.effects_bus.process(mix)
+
+        # Prevent the mix from going outside the range (-1, 1)
+        np.clip(bus_output, -1.0, 1.0, out=out)
+
+    def dump_profile(self):
+        """
+        Log the profile report and write the folded stacks to profile_output, if profiling.
+        """
+        if self.profiler is None:
+            return
+        self.log.info("Profile:\n%s", Lazy(self.profiler.snapshot().report, self.output_sink.xruns))
+        if self.profile_output:
+            self.profiler.snapshot().write_folded_stacks(self.profile_output)
+
+    def render_voices(self, out, voice_output):
+        """
+        Render the sum of all voices into out. out may be part of a chunk.
+        voice_output is a scratch buffer at least as long as out.
+        """
+        # Idle voices have died out completely, so they are skipped until their next note on
+        if self.use_oscillator_bank:
+            if all(voice.idle for voice in self.voices):
+                out.fill(0.0)
+            else:
+                self.bank_chain.render_into(out)
+                tail_levels = self.bank_chain.tail_level()
+                for voice in self.voices:
+                    voice.update_activity(tail_levels)
+        elif self.voice_engine is not None:
+            self.voice_engine.render_into(out)
+        else:
+            out.fill(0.0)
+            if out.shape[-1] != voice_output.shape[-1]:
+                voice_output = voice_output[:out.shape[-1]]
+            for voice in self.voices:
+                if voice.idle:
+                    continue
+                voice.signal_chain.render_into(voice_output)
+                voice.update_activity(voice_output)
+                out += voice_output
 
     def note_on(self, note: int, chan: int):
         """
         Set a voice on with the given note.
-        If there are no unused voices, drop the voice that has been on for the longest and use that voice
+        If there are no unused voices, the voice allocator steals one according to its stealing policy
         """
-        note_id = self.get_note_id(note, chan)
         freq = midi.frequencies[note]
-        for i in range(len(self.voices)):
-            voice = self.voices[i]
-            if not voice.active:
-                voice.note_on(freq, note_id)
-                self.voices.append(self.voices.pop(i)) # Move this voice to the back of the list. It should be popped last
-                break
-
-            if i == len(self.voices) - 1:
-                self.log.debug(f"Had no unused voices!")
-                self.voices[0].note_off()
-                self.voices[0].note_on(freq, note_id)
-                self.voices.append(self.voices.pop(0))
-
+        self.voice_allocator.note_on(note, chan, freq)
 
     def note_off(self, note: int, chan: int):
         """
         Find the voice playing the given note and turn it off.
         """
-        note_id = self.get_note_id(note, chan)
-        for i in range(len(self.voices)):
-            voice = self.voices[i]
-            if voice.active and voice.note_id == note_id:
-                voice.note_off()
+        self.voice_allocator.note_off(note, chan)
     
     def get_note_id(self, note: int, chan: int):
         """
         Generate an id for a given note and channel
-        By hashing the note and channel we can ensure that we are turning off the exact note
-        that was turned on
+        The id is unique for every note and channel so we turn off the exact note that was turned on
+        """
+        return VoiceAllocator.note_key(note, chan)
+
+    def set_parameter(self, control_tag: str, parameter: str, value, voice: int=None):
+        """
+        Set a parameter at the start of the next block, on every voice or only on the voice with the given index.
         """
-        note_id = hash(f"{note}{chan}")
-        return note_id
-        
+        self.parameter_snapshot.set(control_tag, parameter, value, voice)
 
     def set_gain_a(self, gain):
-        for voice in self.voices:
-            gain_a_components = voice.signal_chain.get_components_by_control_tag("gain_a")
-            for gain_a in gain_a_components:
-                gain_a.amp = gain
+        self.parameter_snapshot.set("gain_a", "amp", gain)
 
     def set_gain_b(self, gain):
-        for voice in self.voices:
-            gain_b_components = voice.signal_chain.get_components_by_control_tag("gain_b")
-            for gain_b in gain_b_components:
-                gain_b.amp = gain
+        self.parameter_snapshot.set("gain_b", "amp", gain)
 
     def set_lpf_cutoff(self, cutoff):
-        for voice in self.voices:
-            lpf_components = voice.signal_chain.get_components_by_control_tag("lpf")
-            for lpf in lpf_components:
-                lpf.cutoff_frequency = cutoff
+        self.parameter_snapshot.set("lpf", "cutoff_frequency", cutoff)
 
     def set_delay_time(self, time):
-        for voice in self.voices:
-            delay_components = voice.signal_chain.get_components_by_control_tag("delay")
-            for delay in delay_components:
-                delay.delay_time = time
+        self.parameter_snapshot.set("delay", "delay_time", time)
 
     def set_delay_wet_gain(self, gain):
-        for voice in self.voices:
-            delay_components = voice.signal_chain.get_components_by_control_tag("delay")
-            for delay in delay_components:
-                delay.wet_gain = gain
+        self.parameter_snapshot.set("delay", "wet_gain", gain)